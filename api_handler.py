@@ -2,170 +2,607 @@ import logging.handlers
 import json
 import datetime
 import re
+import math
+import operator
+import random
+import threading
+import time
+import concurrent.futures
 import requests
+import requests.adapters
 from plain_text_tcp_handler import PlainTextTcpHandler
+from query_metrics import QueryMetrics, profiled
+from circuit_breaker import CircuitBreaker
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+from table_columns import COLUMN_NAMES
+
+try:
+    # --orjson parses the API responses several times faster, it is used if the script language container has it
+    from orjson import loads as parse_json
+except ImportError:
+    from json import loads as parse_json
+
+__version__ = '1.1.0'
+
+
+_UNIX_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _group(json_dict: dict, name: str) -> dict:
+    return json_dict.get(name) or {}
+
+
+def _weather(json_dict: dict) -> dict:
+    weather_group = json_dict.get('weather')
+    return weather_group[0] if weather_group else {}
+
+
+def _timestamp(unix_time) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(int(unix_time))
+
+
+def _parse_timestamp(value: str) -> datetime.datetime:
+    """Parses an Exasol timestamp literal like '2021-03-01 12:00:00.000'."""
+    seconds, _, fraction = value.partition('.')
+    return datetime.datetime.strptime(seconds, '%Y-%m-%d %H:%M:%S').replace(
+        microsecond=int(fraction[:6].ljust(6, '0')) if fraction else 0)
+
+
+def _timezone_shift(json_dict: dict) -> float:
+    # --The 'group' endpoint reports the timezone inside the sys group
+    timezone = json_dict.get('timezone') if 'timezone' in json_dict else _group(json_dict, 'sys').get('timezone')
+    return timezone / 3600  # --shift in seconds from UTC -> converted to hours shift
+
+
+TIMESTAMP_COLUMNS = ('DATA_COLLECTION_TIME', 'FORECAST_TIME', 'SUNRISE', 'SUNSET')
+RANGE_OPERATORS: dict = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+# --Per column of CURRENT_WEATHER a function that extracts the value from the JSON of one city. Only the columns the
+# --adapter pushed down are extracted, so unused conversions are skipped.
+CURRENT_WEATHER_EXTRACTORS: dict = {
+    'COUNTRY_CODE': lambda city: _group(city, 'sys').get('country'),
+    'CITY_NAME': lambda city: city.get('name'),
+    'CITY_ID': lambda city: city.get('id'),
+    'DATA_COLLECTION_TIME': lambda city: _timestamp(city.get('dt')),  # --UNIX time -> DB compatible datetime
+    'LONGITUDE': lambda city: _group(city, 'coord').get('lon'),
+    'LATITUDE': lambda city: _group(city, 'coord').get('lat'),
+    'WEATHER_ID': lambda city: _weather(city).get('id'),
+    'WEATHER_GROUP': lambda city: _weather(city).get('main'),
+    'WEATHER_DESCRIPTION': lambda city: _weather(city).get('description'),
+    'WEATHER_ICON_ID': lambda city: _weather(city).get('icon'),
+    'TEMPERATURE': lambda city: _group(city, 'main').get('temp'),  # --degrees centigrade
+    'FELT_TEMPERATURE': lambda city: _group(city, 'main').get('feels_like'),
+    'MIN_TEMPERATURE': lambda city: _group(city, 'main').get('temp_min'),
+    'MAX_TEMPERATURE': lambda city: _group(city, 'main').get('temp_max'),
+    'ATMOSPHERIC_PRESSURE': lambda city: _group(city, 'main').get('pressure'),  # --hPa
+    'RELATIVE_HUMIDITY': lambda city: _group(city, 'main').get('humidity'),  # --%
+    'ATMOSPHERIC_PRESSURE_SEA_LEVEL': lambda city: _group(city, 'main').get('sea_level'),
+    'ATMOSPHERIC_PRESSURE_GROUND_LEVEL': lambda city: _group(city, 'main').get('grnd_level'),
+    'WIND_SPEED': lambda city: _group(city, 'wind').get('speed'),  # --m/s
+    'WIND_DIRECTION': lambda city: _group(city, 'wind').get('deg'),
+    'WIND_GUST': lambda city: _group(city, 'wind').get('gust'),
+    'CLOUDINESS': lambda city: _group(city, 'clouds').get('all'),  # --%
+    'RAIN_1H': lambda city: _group(city, 'rain').get('1h'),  # --mm
+    'RAIN_3H': lambda city: _group(city, 'rain').get('3h'),
+    'SNOW_1H': lambda city: _group(city, 'snow').get('1h'),
+    'SNOW_3H': lambda city: _group(city, 'snow').get('3h'),
+    'VISIBILITY': lambda city: city.get('visibility'),  # --meters
+    'SUNRISE': lambda city: _timestamp(_group(city, 'sys').get('sunrise')),
+    'SUNSET': lambda city: _timestamp(_group(city, 'sys').get('sunset')),
+    'TIMEZONE_SHIFT': _timezone_shift,
+    'ZIP': lambda city: None}  # --Dummy column for filtering
+
+# --Columns of FORECAST that are the same for all forecast slots of a city. They are extracted once per response from
+# --its 'city' group.
+FORECAST_CITY_EXTRACTORS: dict = {
+    'COUNTRY_CODE': lambda city: city.get('country'),
+    'CITY_NAME': lambda city: city.get('name'),
+    'CITY_ID': lambda city: city.get('id'),
+    'LONGITUDE': lambda city: _group(city, 'coord').get('lon'),
+    'LATITUDE': lambda city: _group(city, 'coord').get('lat'),
+    'SUNRISE': lambda city: _timestamp(city.get('sunrise')),
+    'SUNSET': lambda city: _timestamp(city.get('sunset')),
+    'TIMEZONE_SHIFT': lambda city: city.get('timezone') / 3600,
+    'ZIP': lambda city: None}
+
+# --Columns of FORECAST that are extracted from every forecast slot
+FORECAST_RECORD_EXTRACTORS: dict = {
+    # --'dt' is the UNIX time of 'dt_txt', adding it to the epoch is much cheaper than parsing the string
+    'FORECAST_TIME': lambda record: _UNIX_EPOCH + datetime.timedelta(seconds=record['dt']),
+    'WEATHER_ID': lambda record: _weather(record).get('id'),
+    'WEATHER_GROUP': lambda record: _weather(record).get('main'),
+    'WEATHER_DESCRIPTION': lambda record: _weather(record).get('description'),
+    'WEATHER_ICON_ID': lambda record: _weather(record).get('icon'),
+    'TEMPERATURE': lambda record: _group(record, 'main').get('temp'),
+    'FELT_TEMPERATURE': lambda record: _group(record, 'main').get('feels_like'),
+    'MIN_TEMPERATURE': lambda record: _group(record, 'main').get('temp_min'),
+    'MAX_TEMPERATURE': lambda record: _group(record, 'main').get('temp_max'),
+    'ATMOSPHERIC_PRESSURE': lambda record: _group(record, 'main').get('pressure'),
+    'RELATIVE_HUMIDITY': lambda record: _group(record, 'main').get('humidity'),
+    'ATMOSPHERIC_PRESSURE_SEA_LEVEL': lambda record: _group(record, 'main').get('sea_level'),
+    'ATMOSPHERIC_PRESSURE_GROUND_LEVEL': lambda record: _group(record, 'main').get('grnd_level'),
+    'WIND_SPEED': lambda record: _group(record, 'wind').get('speed'),
+    'WIND_DIRECTION': lambda record: _group(record, 'wind').get('deg'),
+    'PERCIPITATION_PROBABILITY': lambda record: record.get('pop'),
+    'CLOUDINESS': lambda record: _group(record, 'clouds').get('all'),
+    'RAIN_3H': lambda record: _group(record, 'rain').get('3h'),
+    'SNOW_3H': lambda record: _group(record, 'snow').get('3h'),
+    'VISIBILITY': lambda record: record.get('visibility')}
+
+
 
 class ApiHandler:
-    def __init__(self, ctx):
+    GROUP_SIZE = 20  # --Maximum number of city IDs the 'group' endpoint accepts in one call
+    FORECAST_SLOTS = 40  # --The forecast endpoint returns 5 days in slots of 3 hours
+    FORECAST_SLOT_HOURS = 3
+    MAX_RETRY_DELAY = 60  # --Seconds
+
+    def __init__(self, ctx, query_id: str = None):
+        """:param query_id: identifies the SQL statement in the query metrics, e.g. session and statement ID."""
         self.ctx = ctx
+        # --The arguments are the same in every row. They are read from the first row, because the columns can not be
+        # --read any more once ctx.next() returned False.
         self.api_host: str = ctx.api_host
         self.api_method: str = ctx.api_method
         self.api_key: str = ctx.api_key
+        api_options: str = ctx.api_options
+        logger_ip, logger_port, logger_level = ctx.logger_ip, int(ctx.logger_port), int(ctx.logger_level)
+
+        # --Sharded pushdowns send one row per shard to each group, so the parameters of all rows are collected
+        self.parameter_expressions: list = []
+        while True:
+            self.parameter_expressions.extend(self.__load_parameter_expressions(ctx.api_parameters))
+            if not ctx.next():
+                break
+
+        options: dict = json.loads(api_options) if api_options else {}
+        self.metrics: QueryMetrics = QueryMetrics('udf', query_id=query_id, api_method=self.api_method)
+        self.profile: bool = bool(options.get('profile', False))
+        self.max_concurrent_requests: int = max(int(options.get('max_concurrent_requests', 1)), 1)
+        self.rate_limiter: RateLimiter = RateLimiter.for_api_key(self.api_key,
+                                                                 float(options.get('max_requests_per_minute', 0)),
+                                                                 int(options.get('max_requests_burst', 1)),
+                                                                 options.get('cache_dir'))
+        self.max_retries: int = int(options.get('max_retries', 3))
+        self.retry_backoff: float = float(options.get('retry_backoff', 1))
+        self.wait_seconds: float = 0.0  # --Time the requests waited for the rate limiter and retries
+        self.retries: int = 0
+        self.skipped_requests: int = 0  # --Requests the open circuit breaker did not send
+        self.failed_requests: int = 0  # --Requests without an answer or with an error status after all retries
+        self._statistics_lock = threading.Lock()
+        self.circuit_breaker: CircuitBreaker = CircuitBreaker.for_host(
+            self.api_host, int(options.get('circuit_breaker_threshold', 5)),
+            float(options.get('circuit_breaker_cooldown', 30)))
+        self.http_pool_size: int = max(int(options.get('http_pool_size', self.max_concurrent_requests)), 1)
+        self.timeout: tuple = (float(options.get('connect_timeout', 5)), float(options.get('read_timeout', 30)))
+        self.session: requests.Session = None
+
+        # --The adapter only passes the columns the query needs, the EMITS clause has the same order. The extractors
+        # --are looked up once, so emitting a row only calls them. For forecasts the columns of the city are
+        # --extracted once per response and copied into the rows of all forecast slots.
+        if self.api_method == 'weather':
+            columns: list = options.get('columns', COLUMN_NAMES['CURRENT_WEATHER'])
+            self.extractors: list = [CURRENT_WEATHER_EXTRACTORS[column] for column in columns]
+        else:
+            columns: list = options.get('columns', COLUMN_NAMES['FORECAST'])
+            self.city_extractors: list = [(position, FORECAST_CITY_EXTRACTORS[column])
+                                          for position, column in enumerate(columns)
+                                          if column in FORECAST_CITY_EXTRACTORS]
+            self.record_extractors: list = [(position, FORECAST_RECORD_EXTRACTORS[column])
+                                            for position, column in enumerate(columns)
+                                            if column in FORECAST_RECORD_EXTRACTORS]
+        self.column_count: int = len(columns)
+
+        # --Range filters of the WHERE clause and the LIMIT of the query are applied before a row is emitted. The range
+        # --filters of all locations are checked first, then the alternatives of the location's own range filters.
+        range_filters: list = self.__parse_range_filters(options.get('range_filters', []))
+        self.row_filters, self.city_filters, self.record_filters = self.__create_filter_set(range_filters)
+        self.location_filters: dict = {location: [self.__create_filter_set(self.__parse_range_filters(alternative))
+                                                  for alternative in alternatives]
+                                       for location, alternatives in options.get('location_filters', {}).items()}
+        self.forecast_count = self.__get_forecast_count(range_filters)
+        self.remaining_rows = options['limit'] if options.get('limit') is not None else math.inf
+
+        self.logger = PlainTextTcpHandler.initialize_logger(logger_ip, logger_port, logger_level)
+        self.cache: ResponseCache = self.__create_cache(options)
+        if self.cache:
+            # --A cached forecast holds all slots, so it is found again by queries with any bound on FORECAST_TIME
+            self.forecast_count = None
+        self.cache_refresh: bool = bool(options.get('cache_refresh', False))  # --Set when the adapter warms the cache
+
+        # --With an emit batch size rows are collected and emitted as one pandas DataFrame per batch
+        self.emit_batch_size: int = int(options.get('emit_batch_size', 0))
+        self.row_buffer: list = []
+        self.rows_emitted: int = 0
+        self.data_frame = None
+        if self.emit_batch_size:
+            try:
+                import pandas
+                self.data_frame = pandas.DataFrame
+            except ImportError:
+                self.logger.warning('E-VS-OWFS-16 EMIT_BATCH_SIZE needs pandas, which is not installed in the script '
+                                    'language container. Rows are emitted one by one.')
+                self.emit_batch_size = 0
 
+    @staticmethod
+    def __load_parameter_expressions(api_parameters: str) -> list:
         try:
-            self.parameter_expressions = json.loads(ctx.api_parameters)
+            parameter_expressions = json.loads(api_parameters)
         except json.decoder.JSONDecodeError:
-            self.parameter_expressions = ctx.api_parameters
+            parameter_expressions = api_parameters  # --Single parameters, e.g. the stale city IDs of a snapshot query
+        except TypeError:
+            return []  # --No input rows, all city IDs of a snapshot query were fresh
+        return parameter_expressions if type(parameter_expressions) == list else [parameter_expressions]
 
-        self.logger = PlainTextTcpHandler.initialize_logger(ctx.logger_ip, int(ctx.logger_port), int(ctx.logger_level))
+    @staticmethod
+    def __parse_range_filters(range_filters: list) -> list:
+        """:returns (column, operator, value) tuples of the range filters the adapter passed, timestamps are parsed."""
+        return [(column, operator_name, _parse_timestamp(value) if column in TIMESTAMP_COLUMNS else value)
+                for column, operator_name, value in range_filters]
+
+    def __create_filter_set(self, range_filters: list) -> tuple:
+        """:returns the filters of current weather rows, of forecast cities and of forecast slots."""
+        return (self.__create_row_filters(range_filters, CURRENT_WEATHER_EXTRACTORS),
+                self.__create_row_filters(range_filters, FORECAST_CITY_EXTRACTORS),
+                self.__create_row_filters(range_filters, FORECAST_RECORD_EXTRACTORS))
+
+    @staticmethod
+    def __create_row_filters(range_filters: list, extractors: dict) -> list:
+        """:returns (extractor, comparison, bound) for the range filters on columns that have an extractor."""
+        return [(extractors[column], RANGE_OPERATORS[operator_name], value)
+                for column, operator_name, value in range_filters if column in extractors]
+
+    def __get_forecast_count(self, range_filters: list):
+        """:returns the number of forecast slots that are needed to reach the latest FORECAST_TIME the query allows, or
+        None if all slots are needed. The API starts with the current slot, so one slot more is requested."""
+        upper_bounds: list = [value for column, operator_name, value in range_filters
+                              if column == 'FORECAST_TIME' and operator_name in ('<', '<=')]
+        if self.api_method != 'forecast' or not upper_bounds:
+            return None
+
+        now: datetime.datetime = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        hours_ahead: float = (min(upper_bounds) - now).total_seconds() / 3600
+        return min(max(math.floor(hours_ahead / self.FORECAST_SLOT_HOURS) + 2, 1), self.FORECAST_SLOTS)
+
+    def __create_cache(self, options: dict):
+        """Creates the response cache unless it is bypassed. A cache directory that can not be written disables the
+        cache instead of failing the query."""
+        if options.get('cache_bypass', True) or not options.get('cache_dir'):
+            return None
+
+        ttls: dict = {'weather': int(options.get('cache_ttl_weather', 600)),
+                      'group': int(options.get('cache_ttl_weather', 600)),
+                      'forecast': int(options.get('cache_ttl_forecast', 10800))}
+        try:
+            return ResponseCache(options['cache_dir'], ttls, int(options.get('cache_max_entries', 10000)))
+        except OSError as e:
+            self.logger.warning(f'E-VS-OWFS-11 Response cache disabled, directory <{options["cache_dir"]}> is not '
+                                f'usable: {e}')
+            return None
 
     def api_calls(self) -> None:
         """Takes the API parameter expression(s) the UDF was called with and unpacks them if they are a list. After
         unpacking the values the class proceeds with calling the API with the respective parameters and emitting the
         results."""
-        if type(self.parameter_expressions) == list:
-            self.__unpack_parameter_expression_list()
-        else:
-            self.__request_api_and_emit(self.parameter_expressions)
+        parameters: list = self.__unpack_parameter_expression_list()
 
-    def __unpack_parameter_expression_list(self) -> None:
+        self.session = self.__create_session()
+        try:
+            with profiled(self.logger, self.profile):
+                api_requests: list = self.__batch_city_ids(parameters)
+                self.__request_api_and_emit(api_requests)
+                with self.metrics.phase('emit'):
+                    self.__flush_rows()
+        finally:
+            self.session.close()
+
+        if self.cache:
+            self.cache.evict()
+            self.metrics.count('cache_hits', self.cache.hits)
+            self.metrics.count('cache_misses', self.cache.misses)
+            self.metrics.count('coalesced_requests', self.cache.coalesced)
+        self.metrics.count('locations', len(parameters))
+        self.metrics.count('rows_emitted', self.rows_emitted)
+        self.metrics.count('retries', self.retries)
+        self.metrics.count('skipped_requests', self.skipped_requests)
+        self.metrics.count('failed_requests', self.failed_requests)
+        self.metrics.add_time('rate_limit_wait', self.wait_seconds)
+        self.metrics.report(self.logger)
+
+        for handler in self.logger.handlers:
+            handler.flush()
+
+        # --Failing the query is better than silently returning the rows of only some locations
+        if self.skipped_requests:
+            raise RuntimeError(f'E-VS-OWFS-18 API <{self.api_host}> failed {self.circuit_breaker.failures} times in a '
+                               f'row. {self.skipped_requests} API requests were skipped, the result would be '
+                               f'incomplete. Please retry the query later.')
+        if self.failed_requests:
+            raise RuntimeError(f'E-VS-OWFS-24 {self.failed_requests} API requests failed, the result would be '
+                               f'incomplete. The log records E-VS-OWFS-8, E-VS-OWFS-17 and E-VS-OWFS-19 name the '
+                               f'failed requests. Please retry the query later.')
+
+    def emit_responses(self, responses) -> None:
+        """Emits already parsed responses without requesting the API, e.g. to measure the emit path in benchmarks.
+        :param responses: (endpoint, parameter, parsed response) tuples."""
+        for api_method, param, json_response_object in responses:
+            self.__emit_response(api_method, param, json_response_object)
+        self.__flush_rows()
+
+    def __create_session(self) -> requests.Session:
+        """Creates the keep-alive session that is shared by all requests of one api_calls() run, so every connection
+        to the API host only pays the TCP and TLS handshake once."""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.http_pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def __unpack_parameter_expression_list(self) -> list:
+        parameters: list = []
         for expression in self.parameter_expressions:
             # -- Handle Null values sent from the adapter
             if (type(expression) == list and any(not element for element in expression)) or not expression:
                 continue
             elif type(expression) == list and (all(element.startswith('id') for element in expression) or all(
                     element.startswith('q') for element in expression)):
-                self.__unpack_const_list_expression(expression)
+                parameters.extend(self.__unpack_const_list_expression(expression))
             elif type(expression) == list and any(element.startswith('zip') for element in expression):
-                self.__handle_zip_code_expression(expression)
+                parameters.append(self.__handle_zip_code_expression(expression))
             elif type(expression) == list:
-                self.__handle_geo_lookup_expression(expression)
+                parameters.append(self.__handle_geo_lookup_expression(expression))
             else:
-                self.__request_api_and_emit(expression)
+                parameters.append(expression)
+        return parameters
 
-    def __unpack_const_list_expression(self, expression: list) -> None:
-        for literal in expression:
-            self.__request_api_and_emit(literal)
+    def __unpack_const_list_expression(self, expression: list) -> list:
+        return [literal for literal in expression]
 
-    def __handle_zip_code_expression(self, expression: list) -> None:
+    def __handle_zip_code_expression(self, expression: list) -> str:
         reg = re.compile('zip')
         zip_index: int = expression.index(list(filter(reg.match, expression))[0])  # --Reverse ZIP, Country Code if reversed
-        self.__request_api_and_emit(f'{expression[zip_index]}{expression[abs(zip_index - 1)]}')
+        return f'{expression[zip_index]}{expression[abs(zip_index - 1)]}'
+
+    def __handle_geo_lookup_expression(self, expression: list) -> str:
+        return '&'.join(expression)
+
+    def __batch_city_ids(self, parameters: list) -> list:
+        """Packs the city IDs of current weather requests into calls of the 'group' endpoint, which returns the weather
+        of up to GROUP_SIZE cities at once. All other parameters and the cached city IDs are requested one by one from the
+        api_method endpoint.
+        :returns a list of (endpoint, parameter) tuples."""
+        city_ids: list = [param[3:] for param in parameters if re.fullmatch(r'id=\d+', param)]
+        if self.api_method != 'weather' or len(city_ids) < 2:
+            return [(self.api_method, param) for param in parameters]
+
+        api_requests: list = [(self.api_method, param) for param in parameters if not re.fullmatch(r'id=\d+', param)]
+        if self.cache and not self.cache_refresh:
+            # --Cities that are cached on their own, e.g. by the cache warming, are read from the cache one by one
+            cached_ids: set = {city_id for city_id in city_ids if self.cache.contains('weather', f'id={city_id}')}
+            api_requests.extend(('weather', f'id={city_id}') for city_id in city_ids if city_id in cached_ids)
+            city_ids = [city_id for city_id in city_ids if city_id not in cached_ids]
+        for index in range(0, len(city_ids), self.GROUP_SIZE):
+            api_requests.append(('group', f"id={','.join(city_ids[index:index + self.GROUP_SIZE])}"))
+        return api_requests
+
+    def __request_api_and_emit(self, api_requests: list) -> None:
+        """Requests the API once per (endpoint, parameter) tuple. Up to max_concurrent_requests requests are in flight
+        at the same time and every response is emitted from the calling thread as soon as it arrives. A new request is
+        only started when a response was emitted, so no more than max_concurrent_requests parsed responses are held in
+        memory, however many locations the query has."""
+        if self.max_concurrent_requests == 1:
+            for api_method, param in api_requests:
+                if not self.remaining_rows:
+                    break
+                self.__emit_response(*self.__request_api(api_method, param))
+            return
 
-    def __handle_geo_lookup_expression(self, expression: str) -> None:
-        parameter: str = '&'.join(expression)
-        self.__request_api_and_emit(parameter)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            pending: set = set()
+            for api_method, param in api_requests:
+                if len(pending) >= self.max_concurrent_requests:
+                    pending = self.__emit_completed(pending)
+                if not self.remaining_rows:
+                    break
+                pending.add(executor.submit(self.__request_api, api_method, param))
+            while pending:
+                pending = self.__emit_completed(pending)
 
-    def __request_api_and_emit(self, param: str) -> None:
-        self.logger.info(f'REQUESTNG API WITH: {param}')
+    def __emit_completed(self, pending: set) -> set:
+        """Waits until at least one of the pending requests is finished and emits the responses of all finished ones.
+        A slow request does not hold back the responses that arrived after it was started.
+        :returns the requests that are still in flight."""
+        done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        while done:
+            # --Dropping the future right after its rows are emitted releases the parsed response
+            self.__emit_response(*done.pop().result())
+        return pending
 
+    def __request_api(self, api_method: str, param: str) -> tuple:
+        """Runs in a worker thread when requests are made concurrently. Must not call ctx.emit.
+        :returns the endpoint, the parameter and the parsed response or None if the request failed."""
+        if not self.cache or self.cache_refresh:
+            return self.__fetch(api_method, param)
+
+        body: bytes = self.cache.get(api_method, param)
+        if body is None:
+            # --Only one UDF instance on the node requests a location at a time, the others wait and reuse its response
+            with self.cache.single_flight(api_method, param, sum(self.timeout)) as body:
+                if body is None:
+                    return self.__fetch(api_method, param)
+
+        with self.metrics.phase('parse_json'):
+            return api_method, param, parse_json(body)
+
+    def __fetch(self, api_method: str, param: str) -> tuple:
+        """Requests the API and retries throttled and failed requests.
+        :returns the endpoint, the parameter and the parsed response or None if the request failed."""
+        self.logger.debug('REQUESTNG API WITH: %s', param)
+        for attempt in range(self.max_retries + 1):
+            # --While the API is unreachable the remaining requests are skipped instead of waiting for timeouts
+            if not self.circuit_breaker.allow_request(probe_timeout=sum(self.timeout)):
+                self.__add_statistics(skipped_requests=1)
+                return api_method, param, None
+
+            self.__add_statistics(wait_seconds=self.rate_limiter.acquire())
+            start: float = time.perf_counter()
+            try:
+                response: requests.Response = self.__api_request(api_method, param)
+            except requests.Timeout:
+                self.metrics.record_request('timeout', time.perf_counter() - start)
+                self.circuit_breaker.record_failure()
+                self.logger.error(f'E-VS-OWFS-8 API request with parameter <{param}> timed out.')
+                self.__add_statistics(failed_requests=1)
+                return api_method, param, None
+            except requests.ConnectionError as e:
+                self.metrics.record_request('connection_error', time.perf_counter() - start)
+                self.circuit_breaker.record_failure()
+                self.logger.error(f'E-VS-OWFS-19 API request with parameter <{param}> failed: {e}')
+                self.__add_statistics(failed_requests=1)
+                return api_method, param, None
+
+            self.metrics.record_request(response.status_code, time.perf_counter() - start, len(response.content))
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+
+            # --Only throttled requests and server errors can succeed when they are repeated
+            retryable: bool = response.status_code == 429 or response.status_code >= 500
+            if response.status_code == 200 or not retryable or attempt == self.max_retries:
+                break
+
+            delay: float = self.__get_retry_delay(response, attempt)
+            self.logger.info('RETRYING API REQUEST WITH: %s || STATUS: %s || DELAY: %.2f s', param,
+                             response.status_code, delay)
+            if response.status_code == 429:
+                self.rate_limiter.defer(delay)  # --The quota of the API key is used up, so all requests pause
+                self.__add_statistics(retries=1)
+            else:
+                time.sleep(delay)
+                self.__add_statistics(wait_seconds=delay, retries=1)
+
+        if response.status_code != 200:
+            self.logger.error(f'E-VS-OWFS-17 API request with parameter <{param}> failed with status '
+                              f'{response.status_code} after {attempt} retries: {response.text[:200]}')
+            if response.status_code != 404:  # --The API answers unknown cities with 404, they have no rows
+                self.__add_statistics(failed_requests=1)
+            return api_method, param, None
+
+        # --Parsing the raw bytes skips decoding the body to a str first
+        with self.metrics.phase('parse_json'):
+            json_response_object: dict = parse_json(response.content)
+
+        if self.cache:
+            try:
+                self.cache.put(api_method, param, response.content)
+                if api_method == 'group':
+                    # --Every city is also cached on its own, so it is found again in any other group of city IDs
+                    for city in json_response_object.get('list') or []:
+                        self.cache.put('weather', f"id={city.get('id')}", json.dumps(city).encode())
+            except OSError as e:
+                self.logger.warning(f'E-VS-OWFS-11 Response for parameter <{param}> could not be cached: {e}')
+        return api_method, param, json_response_object
+
+    def __get_retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """:returns the seconds the API asked to wait in the Retry-After header, otherwise an exponential backoff with
+        jitter, so requests that failed together do not retry at the same time."""
         try:
-            response: requests.Response = self.__api_request(param)
-            json_response_object: dict = json.loads(response.text)
-        except requests.Timeout as e:
-            e.message: str = f'E-VW-OWFS-8 API request with parameter <{param}> timed out.'
-
-        if response and response.status_code == 200:
-            if self.api_method == 'weather':
-                self.__emit_current_weather(json_response_object)
-            elif self.api_method == 'forecast':
-                self.__emit_forecast(json_response_object)
-        else:
-            self.logger.error('')
-
-    def __api_request(self, param: str) -> requests.Response:
-        request: str = f"{self.api_host}{self.api_method}?{param}&units=metric&appid={self.api_key}"
-        self.logger.info(f'REQUEST STRING: {request}\n\n\n')
-        return requests.get(request)
-
-    def __emit_current_weather(self, json_dict: dict) -> None:
-        coord_group = json_dict.get('coord') if json_dict.get('coord') else {}
-        main_group = json_dict.get('main') if json_dict.get('main') else {}
-        weather_group = json_dict.get('weather') if json_dict.get('weather') else {}
-        wind_group = json_dict.get('wind') if json_dict.get('wind') else {}
-        clouds_group = json_dict.get('clouds') if json_dict.get('clouds') else {}
-        rain_group = json_dict.get('rain') if json_dict.get('rain') else {}
-        snow_group = json_dict.get('snow') if json_dict.get('snow') else {}
-        sys_group = json_dict.get('sys') if json_dict.get('sys') else {}
-
-        self.ctx.emit(sys_group.get('country'),  # --country code
-                      json_dict.get('name'),  # --city name
-                      json_dict.get('id'),  # --location id
-                      datetime.datetime.fromtimestamp(int(json_dict.get('dt').__str__())),
-                      # --time of data collection in UNIX format -> converted to DB compatible datetime-string
-                      coord_group.get('lon'),  # --longitude
-                      coord_group.get('lat'),  # --latitude
-                      weather_group[0].get('id'),  # --weather id
-                      weather_group[0].get('main'),  # --weather group
-                      weather_group[0].get('description'),  # --weather condition in the group
-                      weather_group[0].get('icon'),  # --weather icon id
-                      main_group.get('temp'),  # --temperature in degrees centigrade
-                      main_group.get('feels_like'),  # --felt temperature in degrees centigrade
-                      main_group.get('temp_min'),  # --min temperature in degrees centigrade
-                      main_group.get('temp_max'),  # --max temperature in degrees centigradelsius
-                      main_group.get('pressure'),  # --atmospheric pressure in hPa
-                      main_group.get('humidity'),  # --relative humidity in %
-                      main_group.get('sea_level'),  # --atmospheric pressure on the sea level
-                      main_group.get('grnd_level'),  # --atmospheric pressure on the ground level
-                      wind_group.get('speed'),  # --wind speed m/s
-                      wind_group.get('deg'),  # --wind direction
-                      wind_group.get('gust'),  # --wind gust
-                      clouds_group.get('all'),  # --cloudiness in %
-                      rain_group.get('1h'),  # --rain volume in the last hour in mm
-                      rain_group.get('3h'),  # --rain volume in the last 3 hours in mm
-                      snow_group.get('1h'),  # --snow volume in the last hour in mm
-                      snow_group.get('3h'),  # --snow volume in the last 3 hours in mm
-                      json_dict.get('visibility'),  # --visibility in meters
-                      datetime.datetime.fromtimestamp(int(sys_group.get('sunrise').__str__())),
-                      # --sunrise time in UNIX format conversion like data collection time
-                      datetime.datetime.fromtimestamp(int(sys_group.get('sunset').__str__())),
-                      # --sunrise time in UNIX format conversion like data collection time
-                      json_dict.get('timezone') / 3600,  # --shift in seconds from UTC -> converted to hours shift
-                      None)
-
-    def __emit_forecast(self, json_dict: dict) -> None:
-        list_group = json_dict.get('list') if json_dict.get('list') else {}
-        city_group = json_dict.get('city') if json_dict.get('city') else {}
-        coord_group = city_group.get('coord') if city_group else {}
-
-        for record in list_group:
-            main_group = record.get('main') if record.get('main') else {}
-            weather_group = record.get('weather') if record.get('weather') else {}
-            wind_group = record.get('wind') if record.get('wind') else {}
-            clouds_group = record.get('clouds') if record.get('clouds') else {}
-            rain_group = record.get('rain') if record.get('rain') else {}
-            snow_group = record.get('snow') if record.get('snow') else {}
-            sys_group = record.get('sys') if record.get('sys') else {}
-
-            self.ctx.emit(city_group.get('country'),  # --country code
-                          city_group.get('name'),  # --city name
-                          city_group.get('id'),  # --location id
-                          datetime.datetime.strptime(record.get('dt_txt'), '%Y-%m-%d %H:%M:%S'),  # --forecast timestamp
-                          coord_group.get('lon'),  # --longitude
-                          coord_group.get('lat'),  # --latitude
-                          weather_group[0].get('id'),  # --weather id
-                          weather_group[0].get('main'),  # --weather group
-                          weather_group[0].get('description'),  # --weather condition in the group
-                          weather_group[0].get('icon'),  # --weather icon id
-                          main_group.get('temp'),  # --temperature in degrees centigrade
-                          main_group.get('feels_like'),  # --felt temperature in degrees centigrade
-                          main_group.get('temp_min'),  # --min temperature in degrees centigrade
-                          main_group.get('temp_max'),  # --max temperature in degrees centigradelsius
-                          main_group.get('pressure'),  # --atmospheric pressure in hPa
-                          main_group.get('humidity'),  # --relative humidity in %
-                          main_group.get('sea_level'),  # --atmospheric pressure on the sea level
-                          main_group.get('grnd_level'),  # --atmospheric pressure on the ground level
-                          wind_group.get('speed'),  # --wind speed m/s
-                          wind_group.get('deg'),  # --wind direction
-                          record.get('pop'),  # --Probability of precipitation
-                          clouds_group.get('all'),  # --cloudiness in %
-                          rain_group.get('3h'),  # --rain volume in the last 3 hours in mm
-                          snow_group.get('3h'),  # --snow volume in the last 3 hours in mm
-                          record.get('visibility'),  # --visibility in meters
-                          datetime.datetime.fromtimestamp(int(city_group.get('sunrise').__str__())),
-                          # --sunrise time in UNIX format conversion like data collection time
-                          datetime.datetime.fromtimestamp(int(city_group.get('sunset').__str__())),
-                          # --sunrise time in UNIX format conversion like data collection time
-                          city_group.get('timezone') / 3600,  # --shift in seconds from UTC -> converted to hours shift
-                          None)
+            delay: float = float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            delay: float = self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+        return min(delay, self.MAX_RETRY_DELAY)
+
+    def __add_statistics(self, wait_seconds: float = 0.0, retries: int = 0, skipped_requests: int = 0,
+                         failed_requests: int = 0) -> None:
+        with self._statistics_lock:
+            self.wait_seconds += wait_seconds
+            self.retries += retries
+            self.skipped_requests += skipped_requests
+            self.failed_requests += failed_requests
+
+    def __emit_response(self, api_method: str, param: str, json_response_object: dict) -> None:
+        if json_response_object is None:
+            return
+
+        with self.metrics.phase('emit'):
+            if api_method == 'weather':
+                self.__emit_current_weather(json_response_object, self.location_filters.get(param))
+            elif api_method == 'group':
+                for city in json_response_object.get('list') or []:
+                    self.__emit_current_weather(city, self.location_filters.get(f"id={city.get('id')}")
+                                                if self.location_filters else None)
+            elif api_method == 'forecast':
+                self.__emit_forecast(json_response_object, self.location_filters.get(param))
+
+    def __api_request(self, api_method: str, param: str) -> requests.Response:
+        request: str = f"{self.api_host}{api_method}?{param}&units=metric&appid={self.api_key}"
+        if api_method == 'forecast' and self.forecast_count:
+            request += f'&cnt={self.forecast_count}'
+        self.logger.debug('REQUEST STRING: %s\n\n\n', request)
+        return self.session.get(request, timeout=self.timeout)
+
+    @staticmethod
+    def __matches(row_filters: list, json_dict: dict) -> bool:
+        for extract, compare, bound in row_filters:
+            value = extract(json_dict)
+            if value is None or not compare(value, bound):
+                return False
+        return True
+
+    @classmethod
+    def __matches_any(cls, alternatives: list, json_dict: dict) -> bool:
+        for row_filters in alternatives:
+            if cls.__matches(row_filters, json_dict):
+                return True
+        return False
+
+    def __emit_current_weather(self, json_dict: dict, filter_sets: list) -> None:
+        """:param filter_sets: the alternative range filters of the location or None if it has none."""
+        if not self.remaining_rows or not self.__matches(self.row_filters, json_dict):
+            return
+        if filter_sets is None or self.__matches_any([row_filters for row_filters, _, _ in filter_sets], json_dict):
+            self.__emit_row([extract(json_dict) for extract in self.extractors])
+
+    def __emit_forecast(self, json_dict: dict, filter_sets: list) -> None:
+        """:param filter_sets: the alternative range filters of the location or None if it has none."""
+        city_group: dict = json_dict.get('city') or {}
+        if not self.__matches(self.city_filters, city_group):
+            return
+
+        # --The slot filters of every alternative whose city filters match, a slot is emitted if it matches one of them
+        record_filters: list = [self.record_filters] if filter_sets is None else [
+            self.record_filters + alternative_filters for _, city_filters, alternative_filters in filter_sets
+            if self.__matches(city_filters, city_group)]
+        if not record_filters:
+            return
+
+        city_row: list = [None] * self.column_count
+        for position, extract in self.city_extractors:
+            city_row[position] = extract(city_group)
+
+        for record in json_dict.get('list') or []:
+            if not self.remaining_rows:
+                break
+            if self.__matches_any(record_filters, record):
+                row: list = city_row.copy()
+                for position, extract in self.record_extractors:
+                    row[position] = extract(record)
+                self.__emit_row(row)
+
+    def __emit_row(self, row: list) -> None:
+        self.remaining_rows -= 1
+        self.rows_emitted += 1
+        if not self.emit_batch_size:
+            self.ctx.emit(*row)
+            return
+
+        self.row_buffer.append(row)
+        if len(self.row_buffer) >= self.emit_batch_size:
+            self.__flush_rows()
 
+    def __flush_rows(self) -> None:
+        if self.row_buffer:
+            self.ctx.emit(self.data_frame(self.row_buffer))
+            self.row_buffer = []
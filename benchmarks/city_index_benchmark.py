@@ -0,0 +1,78 @@
+"""Measures building, loading and looking up the city index with a city list of OpenWeather's size.
+
+    python benchmarks/city_index_benchmark.py [--city-list city.list.json.gz] [--cities 200000] [--lookups 100000]
+
+Without --city-list a synthetic list with the given number of cities is generated. The real list can be downloaded
+from http://bulk.openweathermap.org/sample/city.list.json.gz.
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+
+import fixtures  # noqa: F401 --Puts the repository on the module path
+from city_index import CityIndex, build, city_key
+
+COUNTRIES: tuple = ('DE', 'US', 'GB', 'FR', 'IT', 'ES', 'RU', 'IN', 'BR', 'CN', 'JP', 'MX', 'PL', 'SE', 'AT')
+SYLLABLES: tuple = ('ber', 'lin', 'ham', 'burg', 'mün', 'chen', 'spring', 'field', 'ka', 'ssel', 'to', 'ron', 'ville',
+                    'san', 'ta', 'ma', 'ria', 'new', 'port', 'do', 'ri', 'ge', 'sta', 'dt', 'o', 'sa', 'ka')
+
+
+def synthetic_city_list(cities: int) -> list:
+    """:returns cities shaped like the entries of city.list.json, some names exist in several countries."""
+    generator = random.Random(0)
+    return [{'id': 1000000 + index,
+             'name': ''.join(generator.choice(SYLLABLES) for _ in range(generator.randint(2, 4))).title(),
+             'state': '', 'country': generator.choice(COUNTRIES),
+             'coord': {'lon': generator.uniform(-180, 180), 'lat': generator.uniform(-90, 90)}}
+            for index in range(cities)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--city-list', help='city.list.json or city.list.json.gz of OpenWeather')
+    parser.add_argument('--cities', type=int, default=200000, help='cities of the synthetic list')
+    parser.add_argument('--lookups', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        city_list_path: str = args.city_list
+        if not city_list_path:
+            city_list_path = os.path.join(directory, 'city.list.json')
+            with open(city_list_path, 'w') as f:
+                json.dump(synthetic_city_list(args.cities), f)
+        with (gzip.open if city_list_path.endswith('.gz') else open)(city_list_path, 'rb') as f:
+            cities: list = json.load(f)
+
+        index_path: str = os.path.join(directory, 'city_index.bin')
+        start: float = time.perf_counter()
+        keys: int = build(city_list_path, index_path)
+        build_seconds: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = CityIndex(index_path)
+        load_ms: float = (time.perf_counter() - start) * 1000
+
+        generator = random.Random(1)
+        samples: list = [generator.choice(cities) for _ in range(args.lookups)]
+        hit_keys: list = [city_key(city['name'], city['country']) for city in samples]
+        miss_keys: list = [f'{key}x' for key in hit_keys]
+
+        timings: dict = {}
+        for name, lookup_keys in (('with country', hit_keys), ('unknown name', miss_keys)):
+            start = time.perf_counter()
+            found: int = sum(index.lookup(key) is not None for key in lookup_keys)
+            timings[name] = ((time.perf_counter() - start) / len(lookup_keys) * 1e6, found)
+        index.close()
+
+        print(f'{len(cities):,} cities, {keys:,} unambiguous names, index {os.path.getsize(index_path) / 1e6:.1f} MB')
+        print(f'build {build_seconds:.2f} s, load {load_ms:.2f} ms')
+        for name, (microseconds, found) in timings.items():
+            print(f'lookup {name:<13} {microseconds:>6.2f} us  {found / len(samples):>6.1%} resolved')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Measures how many rows per second api_handler.ApiHandler emits for already parsed API responses.
+
+    python benchmarks/emit_benchmark.py [--api-method forecast] [--cities 1000] [--columns CITY_NAME,TEMPERATURE]
+"""
+import argparse
+import time
+
+import fixtures
+from api_handler import ApiHandler
+
+
+def run(api_method: str, documents: list, options: dict, repeat: int) -> float:
+    """:returns the best rows per second of repeat runs over the (parameter, response) documents."""
+    best: float = 0.0
+    for _ in range(repeat):
+        ctx = fixtures.FakeContext(api_method, options)
+        handler = ApiHandler(ctx)
+        start: float = time.perf_counter()
+        handler.emit_responses((api_method, param, document) for param, document in documents)
+        best = max(best, ctx.rows / (time.perf_counter() - start))
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--api-method', choices=('forecast', 'weather'), default='forecast')
+    parser.add_argument('--cities', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--columns', help='comma separated projection, all columns by default')
+    parser.add_argument('--emit-batch-size', type=int, default=0, help='emit pandas DataFrames of this many rows')
+    args = parser.parse_args()
+
+    options: dict = {'cache_bypass': True, 'emit_batch_size': args.emit_batch_size}
+    if args.columns:
+        options['columns'] = args.columns.split(',')
+
+    fixture = fixtures.forecast if args.api_method == 'forecast' else fixtures.current_weather
+    documents: list = [(f'id={city_id}', fixture(city_id)) for city_id in range(args.cities)]
+    rows_per_second: float = run(args.api_method, documents, options, args.repeat)
+    print(f'{args.api_method} {args.cities} cities: {rows_per_second:,.0f} rows/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Synthetic OpenWeather responses and a stand-in for the UDF context, so the emit path of api_handler.ApiHandler can
+be measured without an Exasol database or API key."""
+import datetime
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+FORECAST_SLOTS = 40
+START_TIME = 1760000400
+
+
+class FakeContext:
+    """Provides the UDF arguments of api_handler and counts the emitted rows instead of sending them to Exasol. Like
+    the context of Exasol, it raises if a column is read after next() returned False."""
+
+    def __init__(self, api_method: str, api_options: dict, api_parameters: str = '[]',
+                 api_host: str = 'http://127.0.0.1:1/'):
+        self._columns: dict = {'api_host': api_host,
+                               'api_method': api_method,
+                               'api_parameters': api_parameters,
+                               'api_key': 'benchmark',
+                               'logger_ip': '127.0.0.1',
+                               'logger_port': '9',  # --Discard port, nothing listens for the log records
+                               'logger_level': '30',
+                               'api_options': json.dumps(api_options)}
+        self._finished: bool = False
+        self.rows: int = 0
+
+    def __getattr__(self, name: str):
+        if name not in self.__dict__.get('_columns', {}):
+            raise AttributeError(name)
+        if self._finished:
+            raise RuntimeError('Iteration finished')
+        return self._columns[name]
+
+    def next(self) -> bool:
+        self._finished = True
+        return False
+
+    def emit(self, *row) -> None:
+        self.rows += len(row[0]) if len(row) == 1 and hasattr(row[0], 'columns') else 1
+
+
+def current_weather(city_id: int) -> dict:
+    return {'coord': {'lon': 9.18, 'lat': 48.78},
+            'weather': [{'id': 803, 'main': 'Clouds', 'description': 'broken clouds', 'icon': '04d'}],
+            'base': 'stations',
+            'main': {'temp': 12.52, 'feels_like': 11.73, 'temp_min': 11.02, 'temp_max': 13.9, 'pressure': 1019,
+                     'humidity': 77, 'sea_level': 1019, 'grnd_level': 975},
+            'visibility': 10000, 'wind': {'speed': 2.57, 'deg': 230, 'gust': 5.14}, 'clouds': {'all': 75},
+            'rain': {'1h': 0.21}, 'dt': START_TIME,
+            'sys': {'type': 2, 'id': 2000470, 'country': 'DE', 'sunrise': START_TIME - 20000,
+                    'sunset': START_TIME + 20000},
+            'timezone': 7200, 'id': city_id, 'name': f'City {city_id}', 'cod': 200}
+
+
+def forecast(city_id: int) -> dict:
+    slots: list = []
+    for slot in range(FORECAST_SLOTS):
+        dt: int = START_TIME + slot * 10800
+        slots.append({'dt': dt,
+                      'main': {'temp': 12.0 + slot % 5, 'feels_like': 11.1, 'temp_min': 10.4, 'temp_max': 13.2,
+                               'pressure': 1016, 'sea_level': 1016, 'grnd_level': 972, 'humidity': 81,
+                               'temp_kf': 0.8},
+                      'weather': [{'id': 500, 'main': 'Rain', 'description': 'light rain', 'icon': '10d'}],
+                      'clouds': {'all': 90}, 'wind': {'speed': 3.4, 'deg': 210, 'gust': 7.1}, 'visibility': 10000,
+                      'pop': 0.42, 'rain': {'3h': 0.37}, 'sys': {'pod': 'd'},
+                      'dt_txt': f'{_utc(dt)}'})
+    return {'cod': '200', 'message': 0, 'cnt': FORECAST_SLOTS, 'list': slots,
+            'city': {'id': city_id, 'name': f'City {city_id}', 'coord': {'lat': 48.78, 'lon': 9.18}, 'country': 'DE',
+                     'population': 589793, 'timezone': 7200, 'sunrise': START_TIME - 20000,
+                     'sunset': START_TIME + 20000}}
+
+
+def _utc(unix_time: int) -> str:
+    return (datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=unix_time)).strftime('%Y-%m-%d %H:%M:%S')
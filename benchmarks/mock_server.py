@@ -0,0 +1,102 @@
+"""Local stand-in for the OpenWeather API. It serves the weather, group and forecast endpoints with recorded or
+synthetic payloads, and can add latency and answer a share of the requests with errors."""
+import copy
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fixtures
+
+
+class MockOpenWeatherServer:
+    """Serves http://127.0.0.1:<port>/{weather,group,forecast}. Payloads recorded from the real API can be put into
+    a directory as weather.json and forecast.json, otherwise the synthetic payloads of fixtures.py are used.
+
+        server = MockOpenWeatherServer(latency=0.05, error_rate=0.01).start()
+        ctx = fixtures.FakeContext('forecast', options, api_host=server.url)
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, payload_directory: str = None,
+                 latency_jitter: float = 0.0):
+        self.latency: float = latency
+        self.latency_jitter: float = latency_jitter  # --Up to this many seconds are added to the latency at random
+        self.error_rate: float = error_rate
+        self.requests: int = 0
+        self.errors: int = 0
+        self._lock = threading.Lock()
+        self._weather: dict = self.__load_payload(payload_directory, 'weather.json', fixtures.current_weather(0))
+        self._forecast: bytes = json.dumps(
+            self.__load_payload(payload_directory, 'forecast.json', fixtures.forecast(0))).encode()
+        self._server: ThreadingHTTPServer = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}/'
+
+    def start(self) -> 'MockOpenWeatherServer':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self.__create_request_handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='mock-openweather', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def __load_payload(payload_directory: str, file_name: str, default: dict) -> dict:
+        if payload_directory and os.path.exists(os.path.join(payload_directory, file_name)):
+            with open(os.path.join(payload_directory, file_name)) as f:
+                return json.load(f)
+        return default
+
+    def respond(self, path: str, query: dict) -> tuple:
+        """:returns the status code and the body for one request."""
+        with self._lock:
+            self.requests += 1
+            failed: bool = random.random() < self.error_rate
+            self.errors += failed
+        if self.latency or self.latency_jitter:
+            time.sleep(self.latency + random.uniform(0, self.latency_jitter))
+        if failed:
+            return random.choice((429, 500, 503)), b'{"cod": 429, "message": "mock error"}'
+
+        endpoint: str = path.rsplit('/', 1)[-1]
+        if endpoint == 'forecast':
+            return 200, self._forecast
+        elif endpoint == 'weather':
+            return 200, json.dumps(self._weather).encode()
+        elif endpoint == 'group':
+            cities: list = []
+            for city_id in query.get('id', '').split(','):
+                city: dict = copy.deepcopy(self._weather)
+                city['id'] = int(city_id)
+                city['sys']['timezone'] = city.pop('timezone', 0)  # --Like the real group endpoint
+                cities.append(city)
+            return 200, json.dumps({'cnt': len(cities), 'list': cities}).encode()
+        return 404, b'{"cod": "404", "message": "unknown endpoint"}'
+
+    def __create_request_handler(self):
+        server = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # --Keeps the connections alive like the real API
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                status, body = server.respond(url.path, dict(urllib.parse.parse_qsl(url.query)))
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return RequestHandler
@@ -0,0 +1,200 @@
+"""Runs the UDF against the local mock server and times the adapter on large pushdown requests, no Exasol database or
+API key needed.
+
+    python benchmarks/run_benchmarks.py [--cities 10,100,1000] [--concurrency 1,4,16] [--latency 0.02] [--latency-jitter 0]
+
+Every UDF scenario runs in its own process, so the peak RSS is measured per scenario. Request latencies are measured
+around requests.Session.get and include the mock latency. The peak memory of the adapter is measured with tracemalloc.
+"""
+import argparse
+import json
+import multiprocessing
+import queue
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+import fixtures
+from mock_server import MockOpenWeatherServer
+
+
+def percentile(values: list, share: float) -> float:
+    ordered: list = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)] if ordered else 0.0
+
+
+def run_udf_scenario(url: str, api_method: str, cities: int, concurrency: int, repeat: int, results) -> None:
+    """Runs in a child process and puts the measurements into the results queue."""
+    import requests
+    from api_handler import ApiHandler
+
+    latencies: list = []
+    session_get = requests.Session.get
+
+    def timed_get(session, *args, **kwargs):
+        start: float = time.perf_counter()
+        try:
+            return session_get(session, *args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    requests.Session.get = timed_get
+
+    options: dict = {'max_concurrent_requests': concurrency, 'cache_bypass': True, 'max_retries': 3,
+                     'retry_backoff': 0.01}
+    parameters: str = json.dumps([f'id={city_id}' for city_id in range(1, cities + 1)])
+    durations: list = []
+    rows: int = 0
+    for _ in range(repeat):
+        ctx = fixtures.FakeContext(api_method, options, api_parameters=parameters, api_host=url)
+        start: float = time.perf_counter()
+        ApiHandler(ctx).api_calls()
+        durations.append(time.perf_counter() - start)
+        rows = ctx.rows
+
+    results.put({'latencies': latencies, 'durations': durations, 'rows': rows,
+                 'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
+
+
+def wait_for_result(process, results):
+    """:returns the measurements of the scenario process or None if it ended without them, e.g. after an exception."""
+    while True:
+        alive: bool = process.is_alive()
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            if not alive:
+                return None
+
+
+def benchmark_udf(args) -> None:
+    server = MockOpenWeatherServer(args.latency, args.error_rate, args.payloads, args.latency_jitter).start()
+    context = multiprocessing.get_context('fork')
+    print(f'{"table":<9} {"cities":>6} {"conc":>4} {"requests":>8} {"p50 ms":>8} {"p99 ms":>8} {"run s":>7} '
+          f'{"rows/s":>10} {"peak RSS MB":>11}')
+    try:
+        for api_method in args.api_methods.split(','):
+            for cities in (int(value) for value in args.cities.split(',')):
+                for concurrency in (int(value) for value in args.concurrency.split(',')):
+                    results = context.Queue()
+                    process = context.Process(target=run_udf_scenario, args=(
+                        server.url, api_method, cities, concurrency, args.repeat, results))
+                    process.start()
+                    result: dict = wait_for_result(process, results)
+                    process.join()
+                    if result is None:
+                        print(f'{api_method:<9} {cities:>6} {concurrency:>4} failed with exit code {process.exitcode}, '
+                              f'see the traceback above')
+                        continue
+
+                    run_seconds: float = statistics.median(result['durations'])
+                    print(f'{api_method:<9} {cities:>6} {concurrency:>4} '
+                          f'{len(result["latencies"]) // args.repeat:>8} '
+                          f'{percentile(result["latencies"], 0.5) * 1000:>8.1f} '
+                          f'{percentile(result["latencies"], 0.99) * 1000:>8.1f} {run_seconds:>7.2f} '
+                          f'{result["rows"] / run_seconds:>10,.0f} {result["peak_rss_mb"]:>11.1f}')
+    finally:
+        server.stop()
+
+
+def pushdown_request(table: str, filter_json: dict) -> str:
+    recursion_limit: int = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)  # --json.dumps recurses per level of the deep filter chains
+    try:
+        return json.dumps({'type': 'pushdown',
+                           'schemaMetadataInfo': {'name': 'OPENWEATHER',
+                                                  'properties': {'API_KEY': 'benchmark', 'LOG_LISTENER': '127.0.0.1',
+                                                                 'LOG_LISTENER_PORT': '9', 'LOG_LEVEL': 'WARNING'}},
+                           'pushdownRequest': {'type': 'select', 'from': {'type': 'table', 'name': table},
+                                               'filter': filter_json}})
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+def equal(column: str, literal_type: str, value) -> dict:
+    return {'type': 'predicate_equal', 'left': {'type': 'column', 'name': column},
+            'right': {'type': literal_type, 'value': value}}
+
+
+def filter_chain(depth: int) -> dict:
+    """:returns a chain of depth alternating OR and AND expressions. Every OR adds a city name, every AND restricts the
+    next level to a country."""
+    chain: dict = equal('CITY_NAME', 'literal_string', 'City 0')
+    for level in range(1, depth):
+        leaf: dict = (equal('CITY_NAME', 'literal_string', f'City {level}') if level % 2 else
+                      equal('COUNTRY_CODE', 'literal_string', 'DE'))
+        chain = {'type': 'predicate_or' if level % 2 else 'predicate_and', 'expressions': [leaf, chain]}
+    return chain
+
+
+def adapter_filters(size: int, depth: int) -> dict:
+    """:returns large synthetic filters by name, shaped like the pushdown requests Exasol sends."""
+    return {
+        f'AND/OR chain {depth} levels deep': filter_chain(depth),
+        f'IN list of {size} city IDs': {
+            'type': 'predicate_in_constlist', 'expression': {'type': 'column', 'name': 'CITY_ID'},
+            'arguments': [{'type': 'literal_exactnumeric', 'value': str(city_id)} for city_id in range(size)]},
+        f'OR of {size} city names': {
+            'type': 'predicate_or',
+            'expressions': [equal('CITY_NAME', 'literal_string', f'City {index}') for index in range(size)]},
+        f'OR of {size} coordinates': {
+            'type': 'predicate_or',
+            'expressions': [{'type': 'predicate_and',
+                             'expressions': [equal('LATITUDE', 'literal_double', str(index % 90)),
+                                             equal('LONGITUDE', 'literal_double', str(index % 180))]}
+                            for index in range(size)]}}
+
+
+def benchmark_adapter(args) -> None:
+    from openweather_adapter import AdapterCallHandler
+
+    print(f'\n{"pushdown filter":<32} {"parse_filters ms":>16} {"pushdown ms":>12} {"SQL KB":>7} {"peak MB":>8}')
+    for name, filter_json in adapter_filters(args.adapter_size, args.adapter_depth).items():
+        request: str = pushdown_request('FORECAST', filter_json)
+        parse_times: list = []
+        pushdown_times: list = []
+        for _ in range(args.repeat):
+            handler = AdapterCallHandler(request)
+            start: float = time.perf_counter()
+            handler.parse_filters(filter_json)
+            parse_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            response: str = AdapterCallHandler(request).controll_request_processing()
+            pushdown_times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        AdapterCallHandler(request).controll_request_processing()
+        peak_mb: float = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+        print(f'{name:<32} {min(parse_times) * 1000:>16.1f} {min(pushdown_times) * 1000:>12.1f} '
+              f'{len(response) / 1024:>7.0f} {peak_mb:>8.1f}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--api-methods', default='weather,forecast')
+    parser.add_argument('--cities', default='10,100,1000')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds the mock server waits per request')
+    parser.add_argument('--latency-jitter', type=float, default=0.0,
+                        help='up to this many seconds are added to the latency at random')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 429 or 5xx')
+    parser.add_argument('--payloads', help='directory with recorded weather.json and forecast.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--adapter-size', type=int, default=10000, help='locations in the large pushdown requests')
+    parser.add_argument('--adapter-depth', type=int, default=1000, help='levels of the deep pushdown filter chain')
+    parser.add_argument('--skip-udf', action='store_true')
+    parser.add_argument('--skip-adapter', action='store_true')
+    args = parser.parse_args()
+
+    if not args.skip_udf:
+        benchmark_udf(args)
+    if not args.skip_adapter:
+        benchmark_adapter(args)
+
+
+if __name__ == '__main__':
+    main()
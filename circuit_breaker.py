@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """Stops requests to an API host after a number of consecutive failures. Once the cooldown has passed a single
+    probe request is let through and all other requests wait for its result: if it succeeds the breaker closes again
+    and they are sent, otherwise it stays open for another cooldown and they are skipped. Breakers are shared by all
+    handlers running in the same process."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    _breakers: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold: int = failure_threshold
+        self.cooldown: float = cooldown
+        self.state: str = self.CLOSED
+        self.failures: int = 0
+        self._opened_at: float = 0.0
+        self._probe_deadline: float = 0.0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def for_host(cls, api_host: str, failure_threshold: int, cooldown: float) -> 'CircuitBreaker':
+        """Returns the breaker of the given host and creates a new one if the host is unknown or the settings
+        changed."""
+        with cls._registry_lock:
+            breaker: CircuitBreaker = cls._breakers.get(api_host)
+            if breaker is None or (breaker.failure_threshold, breaker.cooldown) != (failure_threshold, cooldown):
+                breaker = CircuitBreaker(failure_threshold, cooldown)
+                cls._breakers[api_host] = breaker
+            return breaker
+
+    def allow_request(self, probe_timeout: float = 60.0) -> bool:
+        """:returns False while the breaker is open. A threshold of 0 disables the breaker. While a probe is in flight
+        the call blocks until the probe's result is recorded.
+        :param probe_timeout: seconds after which a probe without result is presumed lost and the caller sends the next
+        probe, so a probe whose thread failed does not block the others forever."""
+        if not self.failure_threshold:
+            return True
+
+        with self._condition:
+            while True:
+                now: float = time.monotonic()
+                if self.state == self.CLOSED:
+                    return True
+                elif self.state == self.OPEN:
+                    if now - self._opened_at < self.cooldown:
+                        return False
+                    self.state = self.HALF_OPEN  # --The caller sends the probe, all others wait for its result
+                    self._probe_deadline = now + probe_timeout
+                    return True
+                elif now >= self._probe_deadline:
+                    self._probe_deadline = now + probe_timeout
+                    return True
+                self._condition.wait(self._probe_deadline - now)
+
+    def record_success(self) -> None:
+        with self._condition:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._condition.notify_all()
+
+    def record_failure(self) -> None:
+        with self._condition:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.failure_threshold and self.failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._condition.notify_all()
@@ -0,0 +1,83 @@
+import gzip
+import json
+import mmap
+import os
+import sys
+import tempfile
+
+HEADER: bytes = b'openweather city index 1\n'
+
+
+def city_key(name: str, country: str = '') -> str:
+    """:returns the key of a city in the form the adapter uses for the q= parameter, e.g. 'berlin,de' or 'berlin'."""
+    key: str = name.strip().lower()
+    return f'{key},{country.strip().lower()}' if country and country.strip() else key
+
+
+class CityIndex:
+    """Read-only index that resolves city names to OpenWeather city IDs. The file is a header line followed by
+    '<key>\\t<city ID>\\n' lines sorted by the UTF-8 bytes of the key. It is memory-mapped, so loading it does not read
+    the file and a lookup is a binary search that only touches a few pages. Names that belong to more than one city are
+    not part of the index, the API has to decide which city it means."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._data[:len(HEADER)] != HEADER:
+            self._data.close()
+            raise ValueError(f'{path} is not a city index')
+
+    def lookup(self, key: str):
+        """:returns the city ID of the key built by city_key() or None if the name is unknown or ambiguous."""
+        target: bytes = key.encode()
+        low, high = len(HEADER), len(self._data)
+        while low < high:
+            # --low and high are always line starts, the line that contains the middle byte is compared
+            middle: int = (low + high) // 2
+            start: int = self._data.rfind(b'\n', low, middle) + 1 or low
+            end: int = self._data.find(b'\n', start, high)
+            tab: int = self._data.find(b'\t', start, end)
+            line_key: bytes = self._data[start:tab]
+            if target < line_key:
+                high = start
+            elif target > line_key:
+                low = end + 1
+            else:
+                return int(self._data[tab + 1:end])
+        return None
+
+    def close(self) -> None:
+        self._data.close()
+
+
+def build(city_list_path: str, index_path: str) -> int:
+    """Builds the index from the city list of OpenWeather (city.list.json or city.list.json.gz). Every city is indexed
+    by its name with and without its country code.
+    :returns the number of keys in the index."""
+    with (gzip.open if city_list_path.endswith('.gz') else open)(city_list_path, 'rb') as f:
+        cities: list = json.load(f)
+
+    city_ids: dict = {}
+    for city in cities:
+        name: str = ' '.join(str(city.get('name') or '').split())  # --Tabs and line breaks would break the format
+        if not name:
+            continue
+        for key in (city_key(name, city.get('country') or ''), city_key(name)):
+            city_ids.setdefault(key.encode(), set()).add(int(city['id']))
+
+    lines: list = [key + b'\t' + str(ids.pop()).encode() + b'\n'
+                   for key, ids in sorted(city_ids.items()) if len(ids) == 1]
+
+    # --Written to a temporary file first, so a running query never maps a partially written index
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), prefix='.tmp')
+    with os.fdopen(handle, 'wb') as f:
+        f.write(HEADER)
+        f.writelines(lines)
+    os.replace(temp_path, index_path)
+    return len(lines)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('Usage: python city_index.py <city.list.json.gz> <city_index.bin>')
+    print(f'{build(sys.argv[1], sys.argv[2])} names indexed in {sys.argv[2]}')
@@ -1,32 +1,21 @@
 --/
-CREATE OR REPLACE PYTHON3 ADAPTER SCRIPT openweather_vs_scripts.openweather_adapter AS 
-import requests
+CREATE OR REPLACE PYTHON3 ADAPTER SCRIPT openweather_vs_scripts.openweather_adapter AS
 import sys
-from pathlib import Path
 
+BUCKETFS_PATH = '/buckets/bfsdefault/default/openweather_vs/'  # --Upload target of upload_to_bucketfs.sh
+EXPECTED_VERSION = '1.1.0'
 
-def download_python_files():
-    """Downloads the adapter script and logger code from github"""
-    python_code_github_links = ["https://raw.githubusercontent.com/exasol/openweather-virtual-schema/master/openweather_adapter.py",
-                                "https://raw.githubusercontent.com/exasol/openweather-virtual-schema/master/plain_text_tcp_handler.py"]
+sys.path.append(BUCKETFS_PATH)
+import openweather_adapter
 
-    file_names = ['openweather_adapter.py', 'plain_text_tcp_handler.py']
-    for ind, link in enumerate(python_code_github_links):
-        file_path = f"tmp/{file_names[ind]}"
-        Path("tmp/").mkdir(parents=True, exist_ok=True)
-        r = requests.get(link, allow_redirects=True)
+if openweather_adapter.__version__ != EXPECTED_VERSION:
+    raise ImportError(f'E-VS-OWFS-13 Modules in <{BUCKETFS_PATH}> have version <{openweather_adapter.__version__}>, '
+                      f'the scripts expect <{EXPECTED_VERSION}>. Please upload the matching release to BucketFS.')
 
-        with open(file_path, 'wb') as f:
-            f.write(r.content)
-            
 
 def adapter_call(request) -> str:
     """Public entry point to any adapter script on Exasol"""
-    download_python_files()
-    sys.path.append('tmp/')
-    from openweather_adapter import AdapterCallHandler
-    
-    call_handler = AdapterCallHandler(request)
+    call_handler = openweather_adapter.AdapterCallHandler(request, f'{exa.meta.session_id}_{exa.meta.statement_id}')
     return call_handler.controll_request_processing()
 /
 
@@ -34,43 +23,34 @@ def adapter_call(request) -> str:
 --Adapter uses this UDF to request the API
 CREATE OR REPLACE PYTHON3 SET SCRIPT openweather_vs_scripts.api_handler(api_host varchar(100),
                                                                         api_method varchar(100),
-                                                                        api_parameters varchar(2000),
+                                                                        api_parameters varchar(2000000),
                                                                         api_key varchar(50),
                                                                         logger_ip varchar(20),
                                                                         logger_port varchar(10),
-                                                                        logger_level varchar(10))
+                                                                        logger_level varchar(10),
+                                                                        api_options varchar(2000000))
 EMITS(...) AS
-import requests
 import sys
-from pathlib import Path
 
+BUCKETFS_PATH = '/buckets/bfsdefault/default/openweather_vs/'  # --Upload target of upload_to_bucketfs.sh
+EXPECTED_VERSION = '1.1.0'
 
-def download_python_files():
-    """Downloads the UDF and TCP logger code from github"""
-    python_code_github_links = ["https://raw.githubusercontent.com/exasol/openweather-virtual-schema/master/api_handler.py",
-                                "https://raw.githubusercontent.com/exasol/openweather-virtual-schema/master/plain_text_tcp_handler.py"]
+sys.path.append(BUCKETFS_PATH)
+import api_handler
 
-    file_names = ['api_handler.py', 'plain_text_tcp_handler.py']
-    for ind, link in enumerate(python_code_github_links):
-        file_path = f"tmp/{file_names[ind]}"
-        Path("tmp/").mkdir(parents=True, exist_ok=True)
-        r = requests.get(link, allow_redirects=True)
+if api_handler.__version__ != EXPECTED_VERSION:
+    raise ImportError(f'E-VS-OWFS-13 Modules in <{BUCKETFS_PATH}> have version <{api_handler.__version__}>, '
+                      f'the scripts expect <{EXPECTED_VERSION}>. Please upload the matching release to BucketFS.')
 
-        with open(file_path, 'wb') as f:
-            f.write(r.content)
 
 def run(ctx) -> None:
     """Public run method as entry point to any Python UDF on Exasol"""
-    download_python_files()
-    sys.path.append('tmp/')
-    from api_handler import ApiHandler
-    
-    api_handler = ApiHandler(ctx)
+    handler = api_handler.ApiHandler(ctx, f'{exa.meta.session_id}_{exa.meta.statement_id}')
 
-    api_handler.logger.info('>>>>API CALL<<<<')
-    api_handler.logger.info(f'URL PARAMETER SET \n{ctx.api_parameters}\n')
+    handler.logger.info('>>>>API CALL<<<<')
+    handler.logger.debug('URL PARAMETER SET \n%s\n', handler.parameter_expressions)
 
-    api_handler.api_calls()
+    handler.api_calls()
 /
 
 --/
@@ -79,7 +59,61 @@ USING openweather_vs_scripts.openweather_adapter
 WITH API_KEY = '...'
      LOG_LISTENER = '0.0.0.0'   --IP Address
      LOG_LISTENER_PORT = '3333'         --Port
-     LOG_LEVEL = 'INFO'                 --INFO or WARNING
+     LOG_LEVEL = 'INFO'                 --DEBUG, INFO or WARNING
+     MAX_CONCURRENT_REQUESTS = '1'      --Optional: API requests in flight at the same time
+     MAX_REQUESTS_PER_MINUTE = '0'      --Optional: API requests per minute and API key, 0 means unlimited
+     MAX_REQUESTS_BURST = '1'           --Optional: API requests that may start at once
+     MAX_RETRIES = '3'                  --Optional: retries of throttled (429) and failed (5xx) API requests
+     RETRY_BACKOFF = '1'                --Optional: seconds before the first retry, doubled for every further retry
+     HTTP_POOL_SIZE = '1'               --Optional: kept-alive connections to the API, defaults to MAX_CONCURRENT_REQUESTS
+     CONNECT_TIMEOUT = '5'              --Optional: seconds to wait for a connection to the API
+     READ_TIMEOUT = '30'                --Optional: seconds to wait for the API to answer
+     CIRCUIT_BREAKER_THRESHOLD = '5'    --Optional: failed API requests in a row before the remaining ones are skipped
+     CIRCUIT_BREAKER_COOLDOWN = '30'    --Optional: seconds before the API is probed again
+     CACHE_DIR = '/tmp/openweather_vs_cache' --Optional: node local directory of the response cache
+     CACHE_TTL_WEATHER = '600'          --Optional: seconds a cached current weather response stays valid
+     CACHE_TTL_FORECAST = '10800'       --Optional: seconds a cached forecast response stays valid
+     CACHE_MAX_ENTRIES = '10000'        --Optional: cached responses kept before the least recently used are evicted
+     CACHE_BYPASS = 'FALSE'             --Optional: TRUE always requests the API
+     SHARD_COUNT = '1'                  --Optional: UDF instances the locations of one query are spread over
+     EMIT_BATCH_SIZE = '0'              --Optional: rows emitted per pandas DataFrame, 0 emits row by row
+     SNAPSHOT_TABLE = ''                --Optional: local table with the current weather of SNAPSHOT_CITY_IDS
+     SNAPSHOT_CITY_IDS = ''             --Optional: comma separated city IDs that are read from SNAPSHOT_TABLE
+     SNAPSHOT_TTL = '1800'              --Optional: seconds after DATA_COLLECTION_TIME a snapshot row is stale
+     CITY_INDEX = ''                    --Optional: BucketFS path of the index that resolves city names to city IDs
+     WARM_CITY_IDS = ''                 --Optional: city IDs that are requested into the cache on ALTER VIRTUAL SCHEMA ... REFRESH
+     PROFILE = 'FALSE'                  --Optional: TRUE logs cProfile statistics of the adapter and the UDF
+/
+
+--/
+--Optional snapshot of watched cities, set SNAPSHOT_TABLE = 'OPENWEATHER_SNAPSHOT.CURRENT_WEATHER'
+CREATE SCHEMA IF NOT EXISTS openweather_snapshot;
+CREATE TABLE IF NOT EXISTS openweather_snapshot.current_weather LIKE openweather.current_weather;
+/
+
+--/
+--Replaces the stale and missing rows of SNAPSHOT_TABLE, e.g. EXECUTE SCRIPT openweather_vs_scripts.refresh_snapshot('OPENWEATHER')
+CREATE OR REPLACE LUA SCRIPT openweather_vs_scripts.refresh_snapshot(virtual_schema) RETURNS ROWCOUNT AS
+local properties = {}
+local result = query([[SELECT property_name, property_value FROM EXA_ALL_VIRTUAL_SCHEMA_PROPERTIES
+                       WHERE schema_name = :schema_name]], {schema_name = virtual_schema})
+for i = 1, #result do
+    properties[result[i].PROPERTY_NAME] = result[i].PROPERTY_VALUE
+end
+local snapshot_table = properties['SNAPSHOT_TABLE']
+local city_ids = properties['SNAPSHOT_CITY_IDS']
+local ttl = tonumber(properties['SNAPSHOT_TTL'] or '1800')
+if snapshot_table == nil or city_ids == nil then
+    error('Virtual schema ' .. virtual_schema .. ' has no SNAPSHOT_TABLE or SNAPSHOT_CITY_IDS.')
+end
+
+-- Stale rows and cities that are no longer watched are removed, the virtual schema then only requests the API for
+-- the city IDs that are missing in the snapshot
+query([[DELETE FROM ]] .. snapshot_table .. [[ WHERE CITY_ID NOT IN (]] .. city_ids .. [[) OR
+        DATA_COLLECTION_TIME < ADD_SECONDS(CONVERT_TZ(SYSTIMESTAMP, DBTIMEZONE, 'UTC'), -:ttl)]], {ttl = ttl})
+return query([[INSERT INTO ]] .. snapshot_table .. [[ SELECT * FROM "]] .. virtual_schema .. [[".CURRENT_WEATHER
+               WHERE CITY_ID IN (]] .. city_ids .. [[) AND
+                     CITY_ID NOT IN (SELECT CITY_ID FROM ]] .. snapshot_table .. [[)]])
 /
 
 -- Test Current_Weather
@@ -108,3 +142,9 @@ WHERE   city_name = 'Los Angeles' OR
         city_id IN (
         2759794, 3247449, 2957773) OR
         city_name IN ('Minusio', 'Zirndorf', 'Kassel');
+
+---- Test forecast time range and limit
+SELECT city_name, forecast_time, temperature FROM OPENWEATHER.FORECAST
+WHERE   city_name = 'Berlin' AND
+        forecast_time < CURRENT_TIMESTAMP + INTERVAL '24' HOUR
+LIMIT 5;
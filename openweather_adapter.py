@@ -1,29 +1,185 @@
+import functools
 import json
 import logging.handlers
+import sys
+import table_columns
+from city_index import CityIndex
 from plain_text_tcp_handler import PlainTextTcpHandler
+from query_metrics import QueryMetrics, profiled
+
+__version__ = '1.1.0'
+
+# --The table metadata never changes, so the response is built once when the module is loaded
+CREATE_VIRTUAL_SCHEMA_RESPONSE: str = json.dumps({"type": "createVirtualSchema",
+                                                  "schemaMetadata": {"tables": list(table_columns.TABLE_METADATA)}})
+
+UDF_CALL_SQL: str = ('SELECT openweather_vs_scripts.api_handler({api_host}, {api_method}, {api_parameters}, {api_key}, '
+                     '{log_ip}, {log_port}, {log_level}, {api_options}) EMITS ({emits}){from_clause}')
+
+# --Prefix of the API parameter per filter column, COUNTRY_CODE is appended to CITY_NAME or ZIP
+API_PARAMETER_KEYS: dict = {'CITY_NAME': 'q=',
+                            'LONGITUDE': 'lon=',
+                            'LATITUDE': 'lat=',
+                            'CITY_ID': 'id=',
+                            'ZIP': 'zip=',
+                            'COUNTRY_CODE': ','}
+
+# --Column of every kind of location, latitude and longitude only identify a location together
+LOCATION_COLUMNS: dict = {'id': 'CITY_ID', 'zip': 'ZIP', 'q': 'CITY_NAME', 'lat': 'LATITUDE/LONGITUDE',
+                          'country': 'COUNTRY_CODE'}
+
+# --Range filters on these columns compare numbers, all others compare timestamps or strings
+NUMERIC_COLUMNS: frozenset = frozenset(column for emits_types in table_columns.EMITS_TYPES.values()
+                                       for column, emits_type in emits_types.items() if emits_type in ('DOUBLE', 'INT'))
+
+# --Every level of a filter tree is two levels of JSON nesting, the default limit of 1000 fails at about 500 levels
+REQUEST_RECURSION_LIMIT = 10000
+
+
+def _load_request(request: str) -> dict:
+    """Parses the adapter request with a raised recursion limit, so deeply nested filters can be parsed."""
+    recursion_limit: int = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(recursion_limit, REQUEST_RECURSION_LIMIT))
+    try:
+        return json.loads(request)
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+
+@functools.lru_cache(maxsize=None)
+def _open_city_index(path: str) -> CityIndex:
+    """Maps the city index once per adapter process."""
+    return CityIndex(path)
+
+
+def _sql_string(value) -> str:
+    """:returns the value as SQL string literal, single quotes are escaped by doubling them."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class _CacheWarmingContext:
+    """Stands in for the UDF context when the adapter warms the response cache, the rows are not needed."""
+
+    def __init__(self, **columns):
+        self.__dict__.update(columns)
+
+    def next(self) -> bool:
+        return False
+
+    def emit(self, *row) -> None:
+        pass
+
 
 class AdapterCallHandler:
     API_URL = 'https://api.openweathermap.org/data/2.5/'
+    SHARD_CHUNK_SIZE = 20  # --Matches the number of city IDs the UDF requests per call of the 'group' endpoint
+    RANGE_PREDICATES = ('predicate_less', 'predicate_lessequal')
+    MAX_CONJUNCTIONS = 10000  # --Conjunctions an AND may expand into beyond the number of its children's conjunctions
 
-    def __init__(self, request):
-        self.request_json_object: dict = json.loads(request)
+    def __init__(self, request, query_id: str = None):
+        self.request: str = request
+        self.metrics: QueryMetrics = QueryMetrics('adapter', query_id=query_id)
+        with self.metrics.phase('load_request'):
+            self.request_json_object: dict = _load_request(request)
 
         self.api_key: str = self.request_json_object['schemaMetadataInfo']['properties']['API_KEY']
         self.log_listener: str = self.request_json_object['schemaMetadataInfo']['properties']['LOG_LISTENER']
         self.log_listener_port = int(self.request_json_object['schemaMetadataInfo']['properties']['LOG_LISTENER_PORT'])
         self.log_level: str = self.request_json_object['schemaMetadataInfo']['properties']['LOG_LEVEL']
+        self.max_concurrent_requests: int = self.__get_int_property('MAX_CONCURRENT_REQUESTS', 1)
+        self.max_requests_per_minute: int = self.__get_int_property('MAX_REQUESTS_PER_MINUTE', 0)
+        self.max_requests_burst: int = self.__get_int_property('MAX_REQUESTS_BURST', 1)
+        self.max_retries: int = self.__get_int_property('MAX_RETRIES', 3)
+        self.retry_backoff: float = self.__get_float_property('RETRY_BACKOFF', 1)
+        self.circuit_breaker_threshold: int = self.__get_int_property('CIRCUIT_BREAKER_THRESHOLD', 5)
+        self.circuit_breaker_cooldown: float = self.__get_float_property('CIRCUIT_BREAKER_COOLDOWN', 30)
+        self.http_pool_size: int = self.__get_int_property('HTTP_POOL_SIZE', self.max_concurrent_requests)
+        self.connect_timeout: float = self.__get_float_property('CONNECT_TIMEOUT', 5)
+        self.read_timeout: float = self.__get_float_property('READ_TIMEOUT', 30)
+        self.cache_dir: str = self.request_json_object['schemaMetadataInfo']['properties'].get(
+            'CACHE_DIR', '/tmp/openweather_vs_cache')
+        self.cache_ttl_weather: int = self.__get_int_property('CACHE_TTL_WEATHER', 600)
+        self.cache_ttl_forecast: int = self.__get_int_property('CACHE_TTL_FORECAST', 10800)
+        self.cache_max_entries: int = self.__get_int_property('CACHE_MAX_ENTRIES', 10000)
+        self.cache_bypass: bool = self.__get_bool_property('CACHE_BYPASS', False)
+        self.shard_count: int = self.__get_int_property('SHARD_COUNT', 1)
+        self.emit_batch_size: int = self.__get_int_property('EMIT_BATCH_SIZE', 0)
+        self.snapshot_table: str = self.request_json_object['schemaMetadataInfo']['properties'].get('SNAPSHOT_TABLE')
+        self.snapshot_city_ids: set = self.__get_city_ids_property('SNAPSHOT_CITY_IDS')
+        self.snapshot_ttl: int = self.__get_int_property('SNAPSHOT_TTL', 1800)
+        self.profile: bool = self.__get_bool_property('PROFILE', False)
+        self.warm_city_ids: set = self.__get_city_ids_property('WARM_CITY_IDS')
 
         self.logger = PlainTextTcpHandler.initialize_logger(self.log_listener, self.log_listener_port, self.log_level)
+        self.city_index: CityIndex = self.__open_city_index()
+
+    def __get_int_property(self, name: str, default: int) -> int:
+        """Reads an optional whole number property of the virtual schema."""
+        value = self.request_json_object['schemaMetadataInfo']['properties'].get(name, default)
+        try:
+            number: int = int(value)
+            if number < 0:
+                raise ValueError()
+            return number
+        except ValueError:
+            raise ValueError(f'E-VS-OWFS-9 Property {name} only accepts whole numbers >= 0. Found <{value}>.')
+
+    def __get_float_property(self, name: str, default: float) -> float:
+        """Reads an optional decimal number property of the virtual schema, e.g. a timeout in seconds."""
+        value = self.request_json_object['schemaMetadataInfo']['properties'].get(name, default)
+        try:
+            number: float = float(value)
+            if number <= 0:
+                raise ValueError()
+            return number
+        except ValueError:
+            raise ValueError(f'E-VS-OWFS-10 Property {name} only accepts numbers > 0. Found <{value}>.')
+
+    def __get_bool_property(self, name: str, default: bool) -> bool:
+        """Reads an optional TRUE/FALSE property of the virtual schema."""
+        value = self.request_json_object['schemaMetadataInfo']['properties'].get(name, str(default))
+        if value.upper() not in ('TRUE', 'FALSE'):
+            raise ValueError(f'E-VS-OWFS-12 Property {name} only accepts TRUE or FALSE. Found <{value}>.')
+        return value.upper() == 'TRUE'
+
+    def __get_city_ids_property(self, name: str) -> set:
+        """Reads an optional property with a comma separated list of city IDs."""
+        value: str = self.request_json_object['schemaMetadataInfo']['properties'].get(name, '')
+        try:
+            return {int(city_id) for city_id in value.split(',') if city_id.strip()}
+        except ValueError:
+            raise ValueError(f'E-VS-OWFS-20 Property {name} only accepts a comma separated list of city IDs. '
+                             f'Found <{value}>.')
+
+    def __open_city_index(self):
+        """Opens the optional city index. An index that can not be read only disables the lookup of city IDs."""
+        path: str = self.request_json_object['schemaMetadataInfo']['properties'].get('CITY_INDEX')
+        if not path:
+            return None
+        try:
+            return _open_city_index(path)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f'E-VS-OWFS-21 City index <{path}> is not usable, city names are sent to the API: {e}')
+            return None
 
     def controll_request_processing(self) -> str:
         """Takes the parsed JSON request and decides based on the request type how to handle the request.
         :returns a JSON string that will be interpreted by the database."""
+        try:
+            with profiled(self.logger, self.profile):
+                return self.__process_request()
+        finally:
+            for handler in self.logger.handlers:
+                handler.flush()
+
+    def __process_request(self) -> str:
         request_type: str = self.request_json_object["type"]
         if request_type == "createVirtualSchema":
-            return self.__handle_create_virtual_schema()
+            return CREATE_VIRTUAL_SCHEMA_RESPONSE
         elif request_type == "dropVirtualSchema":
             return json.dumps({"type": "dropVirtualSchema"})
         elif request_type == "refresh":
+            self.__warm_cache()
             return json.dumps({"type": "refresh"})
         elif request_type == "setProperties":
             return json.dumps({"type": "setProperties"})
@@ -31,219 +187,39 @@ class AdapterCallHandler:
             return json.dumps({"type": "getCapabilities",
                                "capabilities": ["FILTER_EXPRESSIONS", "LITERAL_STRING", "LITERAL_DOUBLE",
                                                 "LITERAL_EXACTNUMERIC", "FN_PRED_OR", "FN_PRED_AND",
-                                                "FN_PRED_EQUAL", "FN_PRED_IN_CONSTLIST"]})
+                                                "FN_PRED_EQUAL", "FN_PRED_IN_CONSTLIST", "FN_PRED_LESS",
+                                                "FN_PRED_LESSEQUAL", "LITERAL_TIMESTAMP", "SELECTLIST_PROJECTION",
+                                                "LIMIT"]})
         elif request_type == "pushdown":
             return self.__handle_pushdown()
         else:
             raise ValueError('F-VS-OWFS-1 Unsupported adapter callback')
 
-    def __handle_create_virtual_schema(self) -> str:
-        result = {"type": "createVirtualSchema",
-                  "schemaMetadata": {"tables": []}
-                  }
-
-        current_weather: dict = self.__get_current_weather_table_json()
-        weather_forecast: dict = self.__get_forecast_table_json()
+    def __warm_cache(self) -> None:
+        """Requests the current weather and the forecast of WARM_CITY_IDS and replaces their entries in the response
+        cache, so queries on these cities read the cache instead of waiting for the API. Runs on every refresh of the
+        virtual schema, which can be scheduled more often than the cache TTLs."""
+        if not self.warm_city_ids or self.cache_bypass:
+            return
 
-        result["schemaMetadata"]["tables"].append(current_weather)
-        result["schemaMetadata"]["tables"].append(weather_forecast)
-        return json.dumps(result)
+        from api_handler import ApiHandler  # --Only the cache warming needs requests in the adapter
 
-    def __get_current_weather_table_json(self) -> dict:
-        return {"name": "CURRENT_WEATHER",
-                "columns":
-                    [
-                        {"name": "COUNTRY_CODE",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "Countrycode of the country"},
-                        {"name": "CITY_NAME",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "The name of the city"},
-                        {"name": "CITY_ID",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "The ID of the city. Reference: https://openweathermap.org/find?q="},
-                        {"name": "DATA_COLLECTION_TIME",
-                         "dataType": {"type": "TIMESTAMP"},
-                         "comment": "The timestamp when the weather data was collected in UTC."},
-                        {"name": "LONGITUDE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 4},
-                         "comment": "The longitude of the city"},
-                        {"name": "LATITUDE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 4},
-                         "comment": "The latitude of the city"},
-                        {"name": "WEATHER_ID",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "The ID of the current weather condition. Reference: https://openweathermap.org/weather-conditions#Weather-Condition-Codes-2"},
-                        {"name": "WEATHER_GROUP",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "The group name of the overall weather situation"},
-                        {"name": "WEATHER_DESCRIPTION",
-                         "dataType": {"type": "VARCHAR", "size": 2000},
-                         "comment": "The specific sub-group of weather conditions"},
-                        {"name": "WEATHER_ICON_ID",
-                         "dataType": {"type": "VARCHAR", "size": 20},
-                         "comment": "The weather icon ID. Reference: https://openweathermap.org/weather-conditions"},
-                        {"name": "TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Temperature in degrees centigrade"},
-                        {"name": "FELT_TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Temperature as humans perceive it in degrees centigrade"},
-                        {"name": "MIN_TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Lowest currently recorded temperature in degrees centigrade"},
-                        {"name": "MAX_TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Highest currently recorded temperature in degrees centigrade"},
-                        {"name": "ATMOSPHERIC_PRESSURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Atmospheric pressure (on the sea level, if there is no sea_level or grnd_level data) in hPa"},
-                        {"name": "RELATIVE_HUMIDITY",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Relative humidity in %"},
-                        {"name": "ATMOSPHERIC_PRESSURE_SEA_LEVEL",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Atmospheric pressure on the sea level in hPa"},
-                        {"name": "ATMOSPHERIC_PRESSURE_GROUND_LEVEL",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Atmospheric pressure on the ground level in hPa"},
-                        {"name": "WIND_SPEED",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Wind speed in m/s"},
-                        {"name": "WIND_DIRECTION",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Wind direction in meterological degrees"},
-                        {"name": "WIND_GUST",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Wind gust in m/s"},
-                        {"name": "CLOUDINESS",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Cloudiness in % sky coverage"},
-                        {"name": "RAIN_1H",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Rain volume for the last 1 hour in mm"},
-                        {"name": "RAIN_3H",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Rain volume for the last 3 hours in mm"},
-                        {"name": "SNOW_1H",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Snow volume for the last 1 hour in mm"},
-                        {"name": "SNOW_3H",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Snow volume for the last 3 hours in mm"},
-                        {"name": "VISIBILITY",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Visibility in m"},
-                        {"name": "SUNRISE",
-                         "dataType": {"type": "TIMESTAMP"},
-                         "comment": "Sunrise time in UTC"},
-                        {"name": "SUNSET",
-                         "dataType": {"type": "TIMESTAMP"},
-                         "comment": "Sunset time in UTC"},
-                        {"name": "TIMEZONE_SHIFT",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Hour shift from UTC to timezone of the specific city. E.g. 2 means UTC+2"},
-                        {"name": "ZIP",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "Dummy column for filtering API call by ZIP code."}
-                    ]}
-
-    def __get_forecast_table_json(self) -> dict:
-        return {"name": "FORECAST",
-                "columns":
-                    [
-                        {"name": "COUNTRY_CODE",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "Countrycode of the country"},
-                        {"name": "CITY_NAME",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "The name of the city"},
-                        {"name": "CITY_ID",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "The ID of the city. Reference: https://openweathermap.org/find?q="},
-                        {"name": "FORECAST_TIME",
-                         "dataType": {"type": "TIMESTAMP"},
-                         "comment": "The timestamp of the forecast."},
-                        {"name": "LONGITUDE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 4},
-                         "comment": "The longitude of the city"},
-                        {"name": "LATITUDE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 4},
-                         "comment": "The latitude of the city"},
-                        {"name": "WEATHER_ID",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "The ID of the forecasted weather condition. Reference: https://openweathermap.org/weather-conditions#Weather-Condition-Codes-2"},
-                        {"name": "WEATHER_GROUP",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "The group name of the forecasted weather situation"},
-                        {"name": "WEATHER_DESCRIPTION",
-                         "dataType": {"type": "VARCHAR", "size": 2000},
-                         "comment": "The specific sub-group of weather conditions"},
-                        {"name": "WEATHER_ICON_ID",
-                         "dataType": {"type": "VARCHAR", "size": 20},
-                         "comment": "The weather icon ID. Reference: https://openweathermap.org/weather-conditions"},
-                        {"name": "TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Temperature in degrees centigrade"},
-                        {"name": "FELT_TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Temperature as humans perceive it in degrees centigrade"},
-                        {"name": "MIN_TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Lowest currently recorded temperature in degrees centigrade"},
-                        {"name": "MAX_TEMPERATURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Highest currently recorded temperature in degrees centigrade"},
-                        {"name": "ATMOSPHERIC_PRESSURE",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Atmospheric pressure (on the sea level, if there is no sea_level or grnd_level data) in hPa"},
-                        {"name": "RELATIVE_HUMIDITY",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Relative humidity in %"},
-                        {"name": "ATMOSPHERIC_PRESSURE_SEA_LEVEL",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Atmospheric pressure on the sea level in hPa"},
-                        {"name": "ATMOSPHERIC_PRESSURE_GROUND_LEVEL",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Atmospheric pressure on the ground level in hPa"},
-                        {"name": "WIND_SPEED",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Wind speed in m/s"},
-                        {"name": "WIND_DIRECTION",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Wind direction in meterological degrees"},
-                        {"name": "PERCIPITATION_PROBABILITY",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Probability of percipitation"},
-                        {"name": "CLOUDINESS",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Cloudiness in % sky coverage"},
-                        {"name": "RAIN_3H",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Rain volume for the last 3 hours in mm"},
-                        {"name": "SNOW_3H",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 2},
-                         "comment": "Snow volume for the last 3 hours in mm"},
-                        {"name": "VISIBILITY",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Visibility in m"},
-                        {"name": "SUNRISE",
-                         "dataType": {"type": "TIMESTAMP"},
-                         "comment": "Sunrise time in UTC"},
-                        {"name": "SUNSET",
-                         "dataType": {"type": "TIMESTAMP"},
-                         "comment": "Sunset time in UTC"},
-                        {"name": "TIMEZONE_SHIFT",
-                         "dataType": {"type": "DECIMAL", "precision": 18, "scale": 0},
-                         "comment": "Hour shift from UTC to timezone of the specific city. E.g. 2 means UTC+2"},
-                        {"name": "ZIP",
-                         "dataType": {"type": "VARCHAR", "size": 200},
-                         "comment": "Dummy column for filtering API call by ZIP code."}
-                    ]}
+        api_parameters: str = json.dumps([f'id={city_id}' for city_id in sorted(self.warm_city_ids)])
+        api_options: str = self.__create_api_options(cache_refresh=True)
+        for api_method in ('weather', 'forecast'):
+            ctx = _CacheWarmingContext(api_host=self.API_URL, api_method=api_method, api_parameters=api_parameters,
+                                       api_key=self.api_key, logger_ip=self.log_listener,
+                                       logger_port=self.log_listener_port, logger_level=self.logger.level,
+                                       api_options=api_options)
+            try:
+                ApiHandler(ctx).api_calls()
+            except RuntimeError as e:
+                self.logger.warning(f'E-VS-OWFS-22 Cache warming of {api_method} is incomplete: {e}')
 
     def __handle_pushdown(self) -> str:
         self.logger.info('>>>>PUSHDOWN<<<<')
-        self.logger.info(f'{json.dumps(self.request_json_object)}\n\n\n')
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('%s\n\n\n', self.request)
 
         sql: str = self.__build_sql()
         result: dict = {
@@ -252,23 +228,248 @@ class AdapterCallHandler:
         }
 
         self.logger.info('>>>>ADAPTER SQL<<<<<')
-        self.logger.info(f'{json.dumps(sql)}\n\n\n>')
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('%s\n\n\n>', json.dumps(sql))
+        self.metrics.count('sql_bytes', len(sql))
+        self.metrics.report(self.logger)
         return json.dumps(result)
 
     def __build_sql(self):
-        api_method: str = self.__parse_api_method_from_name(self.request_json_object['pushdownRequest']['from']['name'])
-        filters = self.parse_filters(self.request_json_object['pushdownRequest']['filter'])
+        pushdown_request: dict = self.request_json_object['pushdownRequest']
+        table: str = pushdown_request['from']['name']
+        api_method: str = self.__parse_api_method_from_name(table)
+        all_columns: dict = table_columns.EMITS_TYPES[table]
+        self.metrics.attributes['table'] = table
+        with self.metrics.phase('parse_filters'):
+            filter_json: dict = pushdown_request.get('filter')
+            filters, range_filters, location_filters = self.__normalize_filters(
+                self.parse_filters(filter_json)) if filter_json else ([], [], {})
+        self.metrics.count('locations', len(filters))
+        limit = pushdown_request.get('limit', {}).get('numElements')
 
-        log_ip: str = self.logger.handlers[0].host
-        log_port: int = self.logger.handlers[0].port
+        log_ip: str = self.log_listener
+        log_port: int = self.log_listener_port
         log_level: int = self.logger.level
 
-        self.logger.info(f'\n\n\nAPI FILTERS {filters}')
+        select_list: list = self.__parse_select_list(pushdown_request, all_columns)
+        columns: list = list(dict.fromkeys(select_list))  # --Every column is emitted once, even if it is selected twice
+        emits: str = table_columns.emits_clause(table, tuple(columns))
+
+        api_options: str = self.__create_api_options(columns=columns, range_filters=range_filters,
+                                                     location_filters=location_filters, limit=limit)
+
+        self.logger.debug('\n\n\nAPI FILTERS %s', filters)
+
+        udf_call: dict = {'api_host': _sql_string(self.API_URL), 'api_method': _sql_string(api_method),
+                          'api_key': _sql_string(self.api_key), 'log_ip': _sql_string(log_ip),
+                          'log_port': _sql_string(log_port), 'log_level': _sql_string(log_level),
+                          'api_options': _sql_string(api_options), 'emits': emits}
+        if table == 'CURRENT_WEATHER' and not location_filters and self.__is_covered_by_snapshot(filters):
+            sql: str = self.__generate_snapshot_sql(filters, columns, range_filters, all_columns, udf_call)
+        else:
+            sql: str = self.__generate_udf_sql(filters, udf_call)
+
+        if len(columns) < len(select_list):
+            sql = f"SELECT {', '.join(column.lower() for column in select_list)} FROM ({sql})"
+        if limit is not None:
+            sql = f'{sql} LIMIT {int(limit)}'  # --Every UDF instance stops after limit rows, the LIMIT caps the total
+        return sql
+
+    def __create_api_options(self, **query_options) -> str:
+        """:returns the options of the UDF as JSON, the properties of the virtual schema and the query_options."""
+        return json.dumps({'max_concurrent_requests': self.max_concurrent_requests,
+                           'max_requests_per_minute': self.max_requests_per_minute,
+                           'max_requests_burst': self.max_requests_burst,
+                           'max_retries': self.max_retries,
+                           'retry_backoff': self.retry_backoff,
+                           'circuit_breaker_threshold': self.circuit_breaker_threshold,
+                           'circuit_breaker_cooldown': self.circuit_breaker_cooldown,
+                           'http_pool_size': self.http_pool_size,
+                           'connect_timeout': self.connect_timeout,
+                           'read_timeout': self.read_timeout,
+                           'cache_dir': self.cache_dir,
+                           'cache_ttl_weather': self.cache_ttl_weather,
+                           'cache_ttl_forecast': self.cache_ttl_forecast,
+                           'cache_max_entries': self.cache_max_entries,
+                           'cache_bypass': self.cache_bypass,
+                           'emit_batch_size': self.emit_batch_size,
+                           'profile': self.profile,
+                           **query_options})
+
+    def __generate_udf_sql(self, filters: list, udf_call: dict) -> str:
+        """:returns the call of the UDF that requests all locations of the filters from the API."""
+        shards: list = self.__split_into_shards(filters)
+        if len(shards) > 1:
+            # --One group per shard, so Exasol runs a UDF instance per shard and spreads them over the cluster
+            shard_rows: str = ', '.join(f'({shard_id}, {_sql_string(json.dumps(shard))})'
+                                        for shard_id, shard in enumerate(shards))
+            return UDF_CALL_SQL.format(
+                api_parameters='shards.api_parameters',
+                from_clause=f' FROM VALUES {shard_rows} AS shards(shard_id, api_parameters) GROUP BY shard_id',
+                **udf_call)
+        return UDF_CALL_SQL.format(api_parameters=_sql_string(json.dumps(filters)), from_clause='', **udf_call)
+
+    def __is_covered_by_snapshot(self, filters: list) -> bool:
+        """:returns True if the query only asks for city IDs that are kept in the snapshot table."""
+        return bool(self.snapshot_table and filters) and all(
+            location.startswith('id=') and int(location[3:]) in self.snapshot_city_ids for location in filters)
+
+    def __generate_snapshot_sql(self, filters: list, columns: list, range_filters: list, all_columns: dict,
+                                udf_call: dict) -> str:
+        """:returns a query that reads the city IDs from the snapshot table, if their DATA_COLLECTION_TIME is within
+        SNAPSHOT_TTL. Only the city IDs that are stale or missing in the snapshot are requested from the API by the
+        UDF, so a query on fresh snapshot rows causes no API traffic."""
+        fresh: str = (f"DATA_COLLECTION_TIME >= ADD_SECONDS(CONVERT_TZ(SYSTIMESTAMP, DBTIMEZONE, 'UTC'), "
+                      f"-{self.snapshot_ttl})")
+        city_ids: list = [location[3:] for location in filters]
+
+        conditions: list = [f"CITY_ID IN ({', '.join(city_ids)})", fresh]
+        for column, operator, value in range_filters:
+            if all_columns[column] == 'TIMESTAMP':
+                conditions.append(f'"{column}" {operator} TIMESTAMP {_sql_string(value)}')
+            elif all_columns[column] in ('DOUBLE', 'INT'):
+                conditions.append(f'"{column}" {operator} {value!r}')
+            else:
+                conditions.append(f'"{column}" {operator} {_sql_string(value)}')
+        select_list: str = ', '.join(f'"{column}"' for column in columns)
+        snapshot_sql: str = f"SELECT {select_list} FROM {self.snapshot_table} WHERE {' AND '.join(conditions)}"
+
+        from_clause: str = (f" FROM VALUES {', '.join(f'({city_id})' for city_id in city_ids)} AS stale(city_id) "
+                            f"WHERE city_id NOT IN (SELECT CITY_ID FROM {self.snapshot_table} WHERE {fresh})")
+        if self.shard_count > 1:
+            from_clause += f' GROUP BY MOD(city_id, {self.shard_count})'
+        udf_sql: str = UDF_CALL_SQL.format(api_parameters="'id=' || stale.city_id", from_clause=from_clause,
+                                           **udf_call)
+        return f'SELECT * FROM ({snapshot_sql} UNION ALL {udf_sql})'
+
+    @staticmethod
+    def __parse_range_filter(filter_json: dict) -> tuple:
+        """:returns (column, operator, value) with the column on the left side, e.g. 1 < FORECAST_TIME becomes
+        FORECAST_TIME > 1. Exasol does not check the rows of the pushdown again, so a comparison that is not between a
+        column and a literal fails the query instead of being ignored."""
+        inclusive: bool = filter_json['type'] == 'predicate_lessequal'
+        if filter_json['left'].get('type') == 'column':
+            column, literal, operator = filter_json['left'], filter_json['right'], '<=' if inclusive else '<'
+        else:
+            column, literal, operator = filter_json['right'], filter_json['left'], '>=' if inclusive else '>'
+
+        if column.get('type') != 'column' or not literal.get('type', '').startswith('literal_'):
+            raise ValueError(f'E-VS-OWFS-15 Range filter <{json.dumps(filter_json)}> is not supported. Only '
+                             f'comparisons between a column and a literal can be pushed down.')
+
+        if column['name'] in NUMERIC_COLUMNS:
+            return column['name'], operator, float(literal['value'])
+        return column['name'], operator, literal['value']
+
+    @staticmethod
+    def __parse_select_list(pushdown_request: dict, all_columns: dict) -> list:
+        """:returns the names of the columns Exasol needs from the pushdown, in the order of the select list. Without
+        a select list all columns are needed. An empty select list means that only the number of rows matters."""
+        if 'selectList' not in pushdown_request:
+            return list(all_columns)
+        select_list: list = [expression['name'] for expression in pushdown_request['selectList']
+                             if expression.get('type') == 'column']
+        return select_list if select_list else ['CITY_ID']
+
+    def __normalize_filters(self, conjunctions: list) -> tuple:
+        """Turns the conjunctions of the filter into a flat list with one canonical API parameter string per distinct
+        location. City names the city index knows are replaced by their city ID. Duplicates are dropped and city IDs are
+        sorted, so the UDF requests every location only once.
+        The range filters of a conjunction belong to its location. Range filters that are part of every conjunction are
+        returned once for all locations, the others per location as a list of alternatives: a row of the location is
+        emitted if it matches one of them.
+        :returns the locations, the range filters of all locations and the range filters per location."""
+        location_ranges: dict = {}  # --Insertion ordered, per location the set of its alternative range filters
+        for conjunction in conjunctions:
+            leaves: tuple = tuple(leaf for leaf in conjunction if type(leaf) == str)
+            if not conjunction:
+                continue  # --Leaves the adapter could not parse
+            location: str = self.__canonicalize_location(leaves)
+            if location and location.startswith('q=') and self.city_index:
+                # --A known city name joins the batched requests of the city IDs
+                city_id = self.city_index.lookup(location[2:])
+                location = location if city_id is None else f'id={city_id}'
+
+            if location is None:
+                # --Exasol does not check the rows of the pushdown again, so ignoring the condition would drop its rows
+                condition: str = '&'.join(leaf if type(leaf) == str else ' '.join(map(str, leaf))
+                                          for leaf in conjunction)
+                raise ValueError(f'E-VS-OWFS-14 Filter <{condition}> does not identify a location. Every condition of '
+                                 f'the WHERE clause needs a CITY_ID, CITY_NAME, ZIP or LATITUDE and LONGITUDE.')
+            location_ranges.setdefault(location, set()).add(
+                frozenset(leaf for leaf in conjunction if type(leaf) == tuple))
+
+        city_ids: list = sorted(int(location[3:]) for location in location_ranges if location.startswith('id='))
+        locations: list = [location for location in location_ranges if not location.startswith('id=')]
+        locations.extend(f'id={city_id}' for city_id in city_ids)
 
-        if api_method == 'weather':
-            return self.__generate_current_weather_sql(api_method, json.dumps(filters), log_ip, log_port, log_level)
-        elif api_method == 'forecast':
-            return self.__generate_forecast_sql(api_method, json.dumps(filters), log_ip, log_port, log_level)
+        all_alternatives: list = [alternative for alternatives in location_ranges.values()
+                                  for alternative in alternatives]
+        common: frozenset = frozenset.intersection(*all_alternatives) if all_alternatives else frozenset()
+        location_filters: dict = {}
+        for location, alternatives in location_ranges.items():
+            alternatives = {alternative - common for alternative in alternatives}
+            if frozenset() not in alternatives:  # --A location without own range filters needs all its rows
+                location_filters[location] = sorted(sorted(alternative) for alternative in alternatives)
+        return locations, sorted(common), location_filters
+
+    @staticmethod
+    def __leaf_value(leaf: str) -> tuple:
+        """:returns (key, value) of the API parameter of an equality leaf in a fixed form, e.g. ('q', 'berlin') for
+        'q=Berlin ' and ('country', 'de') for ',DE'. City names and country codes are trimmed and lower-cased, the API
+        does not distinguish cases."""
+        if leaf.startswith(','):
+            return 'country', leaf[1:].strip().lower()
+        key, _, value = leaf.partition('=')
+        if key == 'q':
+            return key, value.strip().lower()
+        elif key == 'id':
+            return key, str(int(value))
+        elif key in ('lat', 'lon'):
+            return key, str(float(value))
+        return key, value.strip()
+
+    @classmethod
+    def __canonicalize_location(cls, leaves: tuple):
+        """:returns the API parameter string for the leaves of one conjunction in a fixed form, or None if they do not
+        identify a location. Exasol does not check the rows of the pushdown again, so leaves that the API can not answer
+        together, e.g. a city ID and a city name, fail the query instead of returning the rows of only one of them."""
+        values: dict = dict(cls.__leaf_value(leaf) for leaf in leaves)
+
+        kinds: list = [kind for kind in ('id', 'zip', 'q') if kind in values]
+        if 'lat' in values or 'lon' in values:
+            kinds.append('lat')
+        if values.get('country') and kinds and kinds[0] not in ('zip', 'q'):
+            kinds.insert(0, 'country')
+        if len(kinds) > 1:
+            raise ValueError(f"E-VS-OWFS-23 Filter <{'&'.join(leaves)}> combines "
+                             f"{' and '.join(LOCATION_COLUMNS[kind] for kind in kinds)}, the API can not answer them "
+                             f"together.")
+
+        country_suffix: str = f",{values['country']}" if values.get('country') else ''
+        if 'id' in values:
+            return f"id={values['id']}"
+        elif 'zip' in values:
+            return f"zip={values['zip']}{country_suffix}"
+        elif 'lat' in values and 'lon' in values:
+            return f"lat={values['lat']}&lon={values['lon']}"
+        elif 'q' in values:
+            return f"q={values['q']}{country_suffix}"
+        return None
+
+    def __split_into_shards(self, filters: list) -> list:
+        """Distributes the normalized locations round robin over SHARD_COUNT parameter lists. City IDs are kept together
+        in chunks of SHARD_CHUNK_SIZE, so every shard can still request them in batches."""
+        city_ids: list = [location for location in filters if location.startswith('id=')]
+        units: list = [city_ids[index:index + self.SHARD_CHUNK_SIZE]
+                       for index in range(0, len(city_ids), self.SHARD_CHUNK_SIZE)]
+        units.extend([location] for location in filters if not location.startswith('id='))
+
+        shard_count: int = min(self.shard_count, len(units))
+        if shard_count < 2:
+            return [filters]
+        return [[location for unit in units[shard_id::shard_count] for location in unit]
+                for shard_id in range(shard_count)]
 
     def __parse_api_method_from_name(self, name) -> str:
         if name == 'CURRENT_WEATHER':
@@ -276,154 +477,142 @@ class AdapterCallHandler:
         elif name == 'FORECAST':
             return 'forecast'
 
-    def parse_filters(self, filters):
-        buffer = []
-
-        self.logger.info('>>>>>FILTER<<<<<')
-        self.logger.info(f'{filters}')
-
-        # -- If true filter is 'IN_CONSTLIST'
-        if filters.get('arguments'):
-            for argument in filters.get('arguments'):
-                e: dict = {'left': {'name': filters.get('expression').get('name')},
-                           'right': {'value': argument.get('value')}, 'type': 'predicate_equal'}
-                buffer.append(self.parse_filters(e))
-        # -- Is filters a single filter or a list of filters?
-        elif filters.get('expressions'):
-            for f in filters.get('expressions'):
-                buffer.append(self.parse_filters(f))
-        # -- Leaf element has to be of type 'predicate_equal' because this is the only predicate on leaf level that is supported
-        else:
-            try:
-                return self.__handle_predicate_equal(filters)
-            except (ValueError, KeyError) as err:
-                self.logger.warning(err.message)
-                return None
-        return buffer
-
-    def __handle_predicate_equal(self, filter_json) -> str:
-        """Check if expressions are reversed"""
-
-        if filter_json.get('right').get('value'):
-            filter_value: str = filter_json['right']['value']
-            filter_name: str = filter_json['left']['name']
-        else:
-            filter_value: str = filter_json['left']['value']
-            filter_name: str = filter_json['right']['name']
+    def parse_filters(self, filters) -> list:
+        """Turns the filter tree into the list of its conjunctions, one per combination of the branches of OR
+        expressions and the values of IN lists. E.g. CITY_NAME IN ('Berlin', 'Paris') AND COUNTRY_CODE = 'DE' becomes
+        [('q=Berlin', ',DE'), ('q=Paris', ',DE')]. A conjunction is a tuple of the API parameters of its equality leaves
+        and the (column, operator, value) tuples of its range filters. Leaves that can not be parsed are left out. The
+        tree is walked with an explicit stack, so deeply nested filters do not hit the recursion limit."""
+        debug: bool = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug('>>>>>FILTER<<<<<')
+            self.logger.debug('%s', filters)
+
+        results: list = []  # --The conjunctions of the evaluated expressions with their equality values
+        stack: list = [(filters, False)]
+        while stack:
+            expression, children_evaluated = stack.pop()
+            # -- If true filter is 'IN_CONSTLIST', every argument is a conjunction of its own
+            if expression.get('arguments'):
+                filter_name: str = expression['expression']['name']
+                results.append([self.__conjunction(self.__parse_leaf(filter_name, argument.get('value'), debug))
+                                for argument in expression['arguments']])
+            # -- AND and OR expressions are combined once the conjunctions of their children are known
+            elif expression.get('expressions'):
+                if not children_evaluated:
+                    stack.append((expression, True))
+                    stack.extend((child, False) for child in reversed(expression['expressions']))
+                    continue
+                children: list = results[-len(expression['expressions']):]
+                del results[-len(expression['expressions']):]
+                if expression['type'] == 'predicate_and':
+                    results.append(self.__combine_conjunctions(children))
+                else:
+                    results.append([conjunction for child in children for conjunction in child])
+            elif expression.get('type') in self.RANGE_PREDICATES:
+                results.append([self.__conjunction(self.__parse_range_filter(expression))])
+            # -- Leaf element has to be of type 'predicate_equal' because this is the only other supported predicate
+            else:
+                # -- Check if expressions are reversed
+                if expression['left'].get('type') == 'column':
+                    filter_name, filter_value = expression['left']['name'], expression['right'].get('value')
+                else:
+                    filter_name, filter_value = expression['right']['name'], expression['left'].get('value')
+                results.append([self.__conjunction(self.__parse_leaf(filter_name, filter_value, debug))])
+        return [conjunction for conjunction, _ in results[0]]
+
+    @classmethod
+    def __conjunction(cls, leaf) -> tuple:
+        """:returns the conjunction of a single leaf with the value of its equality leaf per key."""
+        if not leaf:
+            return (), {}
+        return (leaf,), dict((cls.__leaf_value(leaf),) if type(leaf) == str else ())
+
+    @classmethod
+    def __combine_conjunctions(cls, children: list) -> list:
+        """:returns the conjunctions of an AND expression, every conjunction of a child is combined with every
+        conjunction of the other children. A leaf that is part of several children is kept once. Combinations that
+        compare a column with two different values can never match, e.g. CITY_ID IN (1, 5) AND CITY_ID = 5 only keeps
+        CITY_ID = 5, so they are left out. The conjunctions of a child are indexed by their equality values, so only
+        the combinations that can match are built. An AND that would expand into more than MAX_CONJUNCTIONS
+        conjunctions, and more than its children have together, fails instead of exhausting time and memory."""
+        limit: int = max(cls.MAX_CONJUNCTIONS, sum(len(child) for child in children))
+        conjunctions: list = [((), {})]
+        for child in children:
+            # --A single conjunction is combined with the whole child anyway, so the index would only cost time
+            index: dict = cls.__index_values(child) if len(conjunctions) > 1 else {}
+            combined: list = []
+            for left, left_values in conjunctions:
+                for position in cls.__candidates(left_values, index, len(child)):
+                    right, right_values = child[position]
+                    if all(left_values.get(key, value) == value for key, value in right_values.items()):
+                        combined.append((tuple(dict.fromkeys(left + right)), {**left_values, **right_values}))
+                if len(combined) > limit:
+                    raise ValueError(f'E-VS-OWFS-25 Filter combines more than {limit} alternatives of OR expressions '
+                                     f'and IN lists. Please simplify the WHERE clause or split the query.')
+            conjunctions = combined
+        return conjunctions
 
-        self.logger.info(f'Filter name: {filter_name} || Filter value: {filter_value}')
+    @staticmethod
+    def __index_values(child: list) -> dict:
+        """:returns per key the positions of the conjunctions by their value and the positions of the conjunctions
+        without a value for the key."""
+        index: dict = {}
+        for position, (_, values) in enumerate(child):
+            for key, value in values.items():
+                index.setdefault(key, ({}, []))[0].setdefault(value, []).append(position)
+        for key, (_, without) in index.items():
+            without.extend(position for position, (_, values) in enumerate(child) if key not in values)
+        return index
 
-        api_parameter_key_mapping: dict = {'CITY_NAME': 'q=',
-                                           'LONGITUDE': 'lon=',
-                                           'LATITUDE': 'lat=',
-                                           'CITY_ID': 'id=',
-                                           'ZIP': 'zip=',
-                                           'COUNTRY_CODE': ','
-                                           }
+    @staticmethod
+    def __candidates(left_values: dict, index: dict, size: int):
+        """:returns the positions of the conjunctions of a child that have the values of left for the most selective
+        key they share, in the order of the child."""
+        candidates = None
+        for key, value in left_values.items():
+            if key in index:
+                by_value, without = index[key]
+                matches: list = by_value.get(value, [])
+                if candidates is None or len(matches) + len(without) < len(candidates):
+                    candidates = sorted(matches + without) if without else matches
+        return range(size) if candidates is None else candidates
 
+    def __parse_leaf(self, filter_name: str, filter_value, debug: bool):
+        if debug:
+            self.logger.debug('Filter name: %s || Filter value: %s', filter_name, filter_value)
+        try:
+            return self.__handle_predicate_equal(filter_name, filter_value)
+        except (ValueError, KeyError) as err:
+            self.logger.warning(getattr(err, 'message', err.args[0]))
+            return None
+
+    @staticmethod
+    def __handle_predicate_equal(filter_name: str, filter_value) -> str:
+        """:returns the API parameter for the equality filter filter_name = filter_value."""
         if filter_name in ('CITY_NAME', 'COUNTRY_CODE'):
             try:
                 float(filter_value)
                 raise TypeError()
             except ValueError:
-                return f"{api_parameter_key_mapping[filter_name]}{filter_value}"
+                return f"{API_PARAMETER_KEYS[filter_name]}{filter_value}"
             except TypeError as e:
                 e.message = f'E-VS-OWFS-2 {filter_name} column filter does not accept numbers. Found <{filter_value}>.'
                 raise
         elif filter_name in ('LONGITUDE', 'LATITUDE'):
             try:
                 float(filter_value)
-                return f"{api_parameter_key_mapping[filter_name]}{filter_value}"
+                return f"{API_PARAMETER_KEYS[filter_name]}{filter_value}"
             except ValueError as e:
                 e.message = f'E-VS-OWFS-3 {filter_name} column filter only accepts numbers. Found <{filter_value}>.'
                 raise
         elif filter_name in ('CITY_ID', 'ZIP'):
             try:
                 int(filter_value)
-                return f"{api_parameter_key_mapping[filter_name]}{filter_value}"
+                return f"{API_PARAMETER_KEYS[filter_name]}{filter_value}"
             except ValueError as e:
                 e.message = f'E-VS-OWFS-5 {filter_name} column filter only accepts whole numbers. Found <{filter_value}>.'
                 raise
         else:
             raise KeyError(
                 f'E-VS-OWFS-1 Filtering not supported on column {filter_name} in PREDICATE_EQUAL expression.')
-
-    def __generate_current_weather_sql(self, api_method, filters, log_ip, log_port, log_level) -> str:
-        sql: str = f'SELECT openweather_vs_scripts.api_handler(\'{self.API_URL}\', \
-                                                        \'{api_method}\', \
-                                                        \'{filters}\', \
-                                                        \'{self.api_key}\', \
-                                                        \'{log_ip}\', \
-                                                        \'{log_port}\', \
-                                                        \'{log_level}\') \
-                                                        EMITS (country_code VARCHAR(200), \
-                                                                city_name VARCHAR(200), \
-                                                                city_id INT, \
-                                                                data_collection_time TIMESTAMP, \
-                                                                longitude DOUBLE, \
-                                                                latitude DOUBLE, \
-                                                                weather_id INT, \
-                                                                weather_group VARCHAR(200), \
-                                                                weather_description VARCHAR(2000), \
-                                                                weather_icon_id VARCHAR(20), \
-                                                                temperature DOUBLE, \
-                                                                felt_temperature DOUBLE, \
-                                                                min_temperature DOUBLE, \
-                                                                max_temperature DOUBLE, \
-                                                                atmospheric_pressure DOUBLE, \
-                                                                relative_humidity INT, \
-                                                                atmospheric_pressure_sea_level DOUBLE, \
-                                                                atmospheric_pressure_ground_level DOUBLE, \
-                                                                wind_speed DOUBLE, \
-                                                                wind_direction INT, \
-                                                                wind_gust DOUBLE, \
-                                                                cloudiness INT, \
-                                                                rain_1h DOUBLE, \
-                                                                rain_3h DOUBLE, \
-                                                                snow_1h DOUBLE, \
-                                                                snow_3h DOUBLE, \
-                                                                visibility INT, \
-                                                                sunrise TIMESTAMP, \
-                                                                sunset TIMESTAMP, \
-                                                                timezone_shift INT, \
-                                                                zip VARCHAR(200))'
-        return sql
-
-    def __generate_forecast_sql(self, api_method, filters, log_ip, log_port, log_level) -> str:
-        sql: str = f'SELECT openweather_vs_scripts.api_handler(\'{self.API_URL}\', \
-                                                        \'{api_method}\', \
-                                                        \'{filters}\', \
-                                                        \'{self.api_key}\', \
-                                                        \'{log_ip}\', \
-                                                        \'{log_port}\', \
-                                                         \'{log_level}\') \
-                                                        EMITS (country_code VARCHAR(200), \
-                                                                city_name VARCHAR(200), \
-                                                                city_id INT, \
-                                                                forecast_time TIMESTAMP, \
-                                                                longitude DOUBLE, \
-                                                                latitude DOUBLE, \
-                                                                weather_id INT, \
-                                                                weather_group VARCHAR(200), \
-                                                                weather_description VARCHAR(2000), \
-                                                                weather_icon_id VARCHAR(20), \
-                                                                temperature DOUBLE, \
-                                                                felt_temperature DOUBLE, \
-                                                                min_temperature DOUBLE, \
-                                                                max_temperature DOUBLE, \
-                                                                atmospheric_pressure DOUBLE, \
-                                                                relative_humidity INT, \
-                                                                atmospheric_pressure_sea_level DOUBLE, \
-                                                                atmospheric_pressure_ground_level DOUBLE, \
-                                                                wind_speed DOUBLE, \
-                                                                wind_direction INT, \
-                                                                percipitation_probability DOUBLE, \
-                                                                cloudiness INT, \
-                                                                rain_3h DOUBLE, \
-                                                                snow_3h DOUBLE, \
-                                                                visibility INT, \
-                                                                sunrise TIMESTAMP, \
-                                                                sunset TIMESTAMP, \
-                                                                timezone_shift INT, \
-                                                                zip VARCHAR(200))'
-        return sql
\ No newline at end of file
@@ -1,4 +1,7 @@
 import logging.handlers
+import queue
+import threading
+import time
 
 
 class PlainTextTcpHandler(logging.handlers.SocketHandler):
@@ -13,15 +16,101 @@ class PlainTextTcpHandler(logging.handlers.SocketHandler):
         root_logger = logging.getLogger('')
 
         try:
-            if level in ('INFO', 'WARNING', 20, 30):
+            if level in ('DEBUG', 'INFO', 'WARNING', 10, 20, 30):
                 root_logger.setLevel(level)
             else:
                 raise TypeError()
         except TypeError as e:
-            e.message = "E-VS-OWFS-4 Chosen LOG_LEVEL not supported. Please choose 'INFO' or 'WARNING'"
+            e.message = "E-VS-OWFS-4 Chosen LOG_LEVEL not supported. Please choose 'DEBUG', 'INFO' or 'WARNING'"
             raise
 
-        socket_handler = PlainTextTcpHandler(ip, port)
+        # -- UDF and adapter processes can be reused, so an existing handler for the same listener is kept
+        for handler in list(root_logger.handlers):
+            if isinstance(handler, BufferedTcpLogHandler):
+                if (handler.host, handler.port) == (ip, port):
+                    return root_logger
+                root_logger.removeHandler(handler)
+                handler.close()
+
+        socket_handler = BufferedTcpLogHandler(ip, port)
         socket_handler.setFormatter(logging.Formatter('%(asctime)s: %(message)s'))
         root_logger.addHandler(socket_handler)
-        return root_logger
\ No newline at end of file
+        return root_logger
+
+
+class BufferedTcpLogHandler(logging.Handler):
+    """Queues log records and sends them in batches to the log listener from a background thread, so logging does not
+    wait for the network. While the listener is slow or down, records that do not fit into the queue are dropped and
+    counted. While the listener is unreachable flush() does not wait for the queue."""
+
+    def __init__(self, ip: str, port: int, capacity: int = 10000, batch_size: int = 500):
+        super().__init__()
+        self.host: str = ip
+        self.port: int = port
+        self.batch_size: int = batch_size
+        self.dropped: int = 0
+        self.listener_down: bool = False
+        self._reported_dropped: int = 0
+        self._queue: queue.Queue = queue.Queue(capacity)
+        self._target: PlainTextTcpHandler = PlainTextTcpHandler(ip, port)
+        self._thread = threading.Thread(target=self.__send_batches, name='openweather-vs-log', daemon=True)
+        self._thread.start()
+
+    def setFormatter(self, fmt: logging.Formatter) -> None:
+        super().setFormatter(fmt)
+        self._target.setFormatter(fmt)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Waits until all queued records are sent, but at most timeout seconds."""
+        if self.dropped > self._reported_dropped:
+            self.emit(logging.makeLogRecord({'msg': f'{self.dropped - self._reported_dropped} log records dropped',
+                                             'levelno': logging.WARNING, 'levelname': 'WARNING'}))
+            self._reported_dropped = self.dropped
+
+        deadline: float = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and not self.listener_down and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self) -> None:
+        self.flush()
+        try:
+            self._queue.put(None, timeout=1.0)  # --Stops the background thread
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+        self._target.close()
+        super().close()
+
+    def __send_batches(self) -> None:
+        while True:
+            records: list = [self._queue.get()]
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                log_records: list = [record for record in records if record is not None]
+                payload: bytes = b''.join(self._target.makePickle(record) for record in log_records)
+                if payload:
+                    # --SocketHandler.send drops the payload if the listener is unreachable and retries the
+                    # --connection with exponential backoff
+                    self._target.send(payload)
+                    self.listener_down = self._target.sock is None
+                    if self.listener_down:
+                        self.dropped += len(log_records)
+            except Exception:
+                self.dropped += len(records)
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+            if None in records:
+                return
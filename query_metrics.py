@@ -0,0 +1,98 @@
+import collections
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+
+
+def _percentile(ordered: list, share: float) -> float:
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)] if ordered else 0.0
+
+
+class QueryMetrics:
+    """Collects the time spent per phase and the counters of one adapter call or UDF run. Worker threads may add to it
+    concurrently. At the end of the query report() logs everything as one JSON record, so the log listener output can
+    be parsed by tools:
+
+        QUERY METRICS {"component": "udf", "query_id": "4711_3", "api_method": "forecast", "seconds": 1.52, ...}
+
+    The phases of work done in worker threads are summed up over all threads, so they can be larger than the wall
+    clock time of the query."""
+
+    def __init__(self, component: str, **attributes):
+        self.component: str = component
+        self.attributes: dict = attributes
+        self.phases: dict = collections.defaultdict(float)
+        self.counters: dict = collections.defaultdict(int)
+        self.statuses: collections.Counter = collections.Counter()
+        self.latencies: list = []
+        self._started: float = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Adds the time spent in the with block to the phase."""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] += seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def record_request(self, status, seconds: float, bytes_received: int = 0) -> None:
+        """Records one API request. status is the HTTP status code or a name like 'timeout' if there was no answer."""
+        with self._lock:
+            self.counters['requests'] += 1
+            self.counters['bytes_received'] += bytes_received
+            self.statuses[str(status)] += 1
+            self.latencies.append(seconds)
+            self.phases['http'] += seconds
+
+    def summary(self) -> dict:
+        with self._lock:
+            latencies: list = sorted(self.latencies)
+            summary: dict = {'component': self.component, **self.attributes,
+                             'seconds': round(time.perf_counter() - self._started, 4),
+                             'phases': {name: round(seconds, 4) for name, seconds in self.phases.items()},
+                             'counters': dict(self.counters)}
+            if latencies:
+                summary['statuses'] = dict(self.statuses)
+                summary['latency_ms'] = {'p50': round(_percentile(latencies, 0.5) * 1000, 1),
+                                         'p90': round(_percentile(latencies, 0.9) * 1000, 1),
+                                         'p99': round(_percentile(latencies, 0.99) * 1000, 1),
+                                         'max': round(latencies[-1] * 1000, 1)}
+        return summary
+
+    def report(self, logger) -> None:
+        if logger.isEnabledFor(logging.INFO):  # --At WARNING the summary is not even built
+            logger.info('QUERY METRICS %s', json.dumps(self.summary()))
+
+
+@contextlib.contextmanager
+def profiled(logger, enabled: bool, limit: int = 40):
+    """Runs the with block under cProfile if enabled and logs the functions with the highest cumulative time. Only the
+    calling thread is profiled, the worker threads of concurrent API requests are not."""
+    if not enabled:
+        yield
+        return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(limit)
+        logger.warning('PROFILE\n%s', stream.getvalue())  # --Opted in, so it is logged at every LOG_LEVEL
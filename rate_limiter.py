@@ -0,0 +1,104 @@
+import contextlib
+import fcntl
+import hashlib
+import os
+import struct
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket that limits the API requests started for one API key. The bucket holds up to burst tokens and is
+    refilled with the configured number of requests per minute. With a directory the bucket is kept in a file there,
+    so all UDF instances on the node share it. Without one, or if the file can not be used, the bucket is only shared
+    by the handlers running in the same process."""
+
+    STATE_FORMAT = 'ddd'  # --Tokens, time of the last refill and time until which defer() paused the requests
+
+    _limiters: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: float, burst: int = 1, path: str = None):
+        self.requests_per_minute: float = requests_per_minute
+        self.burst: int = max(burst, 1)
+        self.rate: float = requests_per_minute / 60.0  # --Tokens per second
+        self.path: str = path
+        self._lock = threading.Lock()
+        self._tokens: float = float(self.burst)
+        self._updated: float = time.time()
+        self._blocked_until: float = 0.0
+
+    @classmethod
+    def for_api_key(cls, api_key: str, requests_per_minute: float, burst: int = 1,
+                    directory: str = None) -> 'RateLimiter':
+        """Returns the limiter of the given API key and creates a new one if the key is unknown or the limits changed.
+        The file of a shared bucket is named after a hash of the API key, the key itself is never written."""
+        path: str = None
+        if directory:
+            path = os.path.join(directory, '.ratelimit' + hashlib.sha256(api_key.encode()).hexdigest())
+        with cls._registry_lock:
+            limiter: RateLimiter = cls._limiters.get(api_key)
+            if limiter is None or (limiter.requests_per_minute, limiter.burst, limiter.path) != \
+                    (requests_per_minute, max(burst, 1), path):
+                limiter = RateLimiter(requests_per_minute, burst, path)
+                cls._limiters[api_key] = limiter
+            return limiter
+
+    def acquire(self) -> float:
+        """Blocks the calling thread until it is allowed to start the next request. A rate of 0 disables the limit,
+        but a pause requested with defer() is still respected.
+        :returns the seconds the thread waited."""
+        with self.__state() as state:
+            now: float = time.time()
+            wait: float = max(state[2] - now, 0.0)
+            if self.rate > 0:
+                # --A missing token is reserved, so waiting threads are served in the order they arrived
+                state[0] = min(self.burst, state[0] + max(now - state[1], 0.0) * self.rate) - 1
+                state[1] = now
+                if state[0] < 0:
+                    wait = max(wait, -state[0] / self.rate)
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, seconds: float) -> None:
+        """Pauses all requests of the API key, e.g. after the API answered that the quota is exceeded."""
+        with self.__state() as state:
+            state[2] = max(state[2], time.time() + seconds)
+
+    @contextlib.contextmanager
+    def __state(self):
+        """Locks the bucket and yields its state as a list the caller updates. A shared bucket is read from its file
+        under an exclusive lock and written back before the lock is released. The lock is only held for the update,
+        the caller sleeps without it."""
+        with self._lock:
+            handle: int = self.__open()
+            if handle is None:
+                state: list = [self._tokens, self._updated, self._blocked_until]
+                yield state
+                self._tokens, self._updated, self._blocked_until = state
+                return
+
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+                data: bytes = os.pread(handle, struct.calcsize(self.STATE_FORMAT), 0)
+                if len(data) == struct.calcsize(self.STATE_FORMAT):
+                    state: list = list(struct.unpack(self.STATE_FORMAT, data))
+                else:
+                    state: list = [float(self.burst), time.time(), 0.0]  # --The first instance creates the bucket
+                yield state
+                os.pwrite(handle, struct.pack(self.STATE_FORMAT, *state), 0)
+            finally:
+                os.close(handle)  # --Also releases the lock
+
+    def __open(self):
+        """:returns the handle of the bucket file or None if the bucket is local to the process."""
+        if not self.path:
+            return None
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError:
+            self.path = None  # --E.g. a directory that can not be written, the limit then holds per process
+            return None
@@ -0,0 +1,150 @@
+import contextlib
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+
+class ResponseCache:
+    """Stores API response bodies as files in a local directory, so that all UDF instances on a node can share them.
+    Every file starts with the time it was written, followed by the raw response body. Entries expire after the TTL of
+    their API method and the least recently used entries are evicted once more than max_entries files exist."""
+
+    LOCK_EXPIRY = 3600  # --Seconds after which evict() removes a lock file that was not used
+
+    def __init__(self, directory: str, ttls: dict, max_entries: int):
+        self.directory: str = directory
+        self.ttls: dict = ttls
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.coalesced: int = 0  # --Responses another thread or process requested while this one waited for the lock
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def normalize_key(api_method: str, param: str) -> str:
+        """Builds the cache key from the endpoint and the sorted query parameters. The API key is never part of it."""
+        pairs: list = sorted(pair for pair in param.lower().split('&') if pair and not pair.startswith('appid='))
+        return f"{api_method}?{'&'.join(pairs)}"
+
+    def get(self, api_method: str, param: str):
+        """:returns the cached response body or None if there is no entry that is younger than the TTL."""
+        body: bytes = self.__read(api_method, param)
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def contains(self, api_method: str, param: str) -> bool:
+        """:returns True if there is an entry that is younger than the TTL, without counting it as hit or miss."""
+        return self.__read(api_method, param) is not None
+
+    @contextlib.contextmanager
+    def single_flight(self, api_method: str, param: str, timeout: float):
+        """Lets only one thread or process on the node request the API for a key at a time. It holds an exclusive lock
+        on the lock file of the key, the others wait for the lock and then read the response it cached. After timeout
+        seconds a waiting caller gives up and requests the API itself.
+        :yields the response body another caller cached while this one waited, or None. On None the caller requests
+        the API and puts the response while it still holds the lock."""
+        if not self.ttls.get(api_method, 0):
+            yield None  # --Nothing is cached for the API method, so waiting would only serialize the requests
+            return
+
+        try:
+            handle: int = os.open(self.__path(api_method, param, prefix='.lock'), os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError:
+            yield None
+            return
+
+        try:
+            self.__lock_file(handle, timeout)
+            body: bytes = self.__read(api_method, param)
+            if body is not None:
+                with self._lock:
+                    self.coalesced += 1
+            yield body
+        finally:
+            os.close(handle)  # --Also releases the lock
+
+    @staticmethod
+    def __lock_file(handle: int, timeout: float) -> bool:
+        """Polls for the exclusive lock, so a waiting thread never blocks longer than timeout.
+        :returns False if the lock was not acquired in time."""
+        deadline: float = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.utime(handle)  # --Keeps evict() from removing a lock file that is in use
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.01)
+
+    def __read(self, api_method: str, param: str):
+        """:returns the cached response body or None if there is no entry that is younger than the TTL."""
+        path: str = self.__path(api_method, param)
+        try:
+            with open(path, 'rb') as f:
+                written_at, _, body = f.read().partition(b'\n')
+            if time.time() - float(written_at) > self.ttls.get(api_method, 0):
+                return None
+            os.utime(path)  # --The modification time tracks the last use for the LRU eviction
+            return body
+        except (OSError, ValueError):
+            return None
+
+    def put(self, api_method: str, param: str, body: bytes) -> None:
+        if not self.ttls.get(api_method, 0):
+            return
+
+        # --Write to a temporary file first, so concurrent readers never see a partially written entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                f.write(f'{time.time()}\n'.encode())
+                f.write(body)
+            os.replace(temp_path, self.__path(api_method, param))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until at most max_entries remain, and lock files that were not
+        used for LOCK_EXPIRY seconds."""
+        entries: list = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(('.tmp', '.ratelimit')):
+                continue  # --Files that are written right now and the buckets of the rate limiter
+            elif entry.name.startswith('.lock'):
+                try:
+                    if time.time() - entry.stat().st_mtime > self.LOCK_EXPIRY:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def __path(self, api_method: str, param: str, prefix: str = '') -> str:
+        file_name: str = hashlib.sha256(self.normalize_key(api_method, param).encode()).hexdigest()
+        return os.path.join(self.directory, prefix + file_name)
@@ -0,0 +1,116 @@
+"""Declarative registry of the columns of the virtual tables. The adapter derives the table metadata and the EMITS
+clauses of the pushdown from it, the api_handler UDF the order in which it emits the columns. Everything that is
+derived is computed once when the module is loaded."""
+import collections
+import functools
+
+Column = collections.namedtuple('Column', ('name', 'data_type', 'comment'))
+
+
+def _varchar(size: int) -> dict:
+    return {'type': 'VARCHAR', 'size': size}
+
+
+def _decimal(scale: int) -> dict:
+    return {'type': 'DECIMAL', 'precision': 18, 'scale': scale}
+
+
+_TIMESTAMP: dict = {'type': 'TIMESTAMP'}
+
+CURRENT_WEATHER: tuple = (
+    Column('COUNTRY_CODE', _varchar(200), 'Countrycode of the country'),
+    Column('CITY_NAME', _varchar(200), 'The name of the city'),
+    Column('CITY_ID', _decimal(0), 'The ID of the city. Reference: https://openweathermap.org/find?q='),
+    Column('DATA_COLLECTION_TIME', _TIMESTAMP, 'The timestamp when the weather data was collected in UTC.'),
+    Column('LONGITUDE', _decimal(4), 'The longitude of the city'),
+    Column('LATITUDE', _decimal(4), 'The latitude of the city'),
+    Column('WEATHER_ID', _decimal(0), 'The ID of the current weather condition. Reference: '
+                                      'https://openweathermap.org/weather-conditions#Weather-Condition-Codes-2'),
+    Column('WEATHER_GROUP', _varchar(200), 'The group name of the overall weather situation'),
+    Column('WEATHER_DESCRIPTION', _varchar(2000), 'The specific sub-group of weather conditions'),
+    Column('WEATHER_ICON_ID', _varchar(20), 'The weather icon ID. Reference: '
+                                            'https://openweathermap.org/weather-conditions'),
+    Column('TEMPERATURE', _decimal(2), 'Temperature in degrees centigrade'),
+    Column('FELT_TEMPERATURE', _decimal(2), 'Temperature as humans perceive it in degrees centigrade'),
+    Column('MIN_TEMPERATURE', _decimal(2), 'Lowest currently recorded temperature in degrees centigrade'),
+    Column('MAX_TEMPERATURE', _decimal(2), 'Highest currently recorded temperature in degrees centigrade'),
+    Column('ATMOSPHERIC_PRESSURE', _decimal(2), 'Atmospheric pressure (on the sea level, if there is no sea_level or '
+                                                'grnd_level data) in hPa'),
+    Column('RELATIVE_HUMIDITY', _decimal(0), 'Relative humidity in %'),
+    Column('ATMOSPHERIC_PRESSURE_SEA_LEVEL', _decimal(2), 'Atmospheric pressure on the sea level in hPa'),
+    Column('ATMOSPHERIC_PRESSURE_GROUND_LEVEL', _decimal(2), 'Atmospheric pressure on the ground level in hPa'),
+    Column('WIND_SPEED', _decimal(2), 'Wind speed in m/s'),
+    Column('WIND_DIRECTION', _decimal(0), 'Wind direction in meterological degrees'),
+    Column('WIND_GUST', _decimal(2), 'Wind gust in m/s'),
+    Column('CLOUDINESS', _decimal(0), 'Cloudiness in % sky coverage'),
+    Column('RAIN_1H', _decimal(2), 'Rain volume for the last 1 hour in mm'),
+    Column('RAIN_3H', _decimal(2), 'Rain volume for the last 3 hours in mm'),
+    Column('SNOW_1H', _decimal(2), 'Snow volume for the last 1 hour in mm'),
+    Column('SNOW_3H', _decimal(2), 'Snow volume for the last 3 hours in mm'),
+    Column('VISIBILITY', _decimal(0), 'Visibility in m'),
+    Column('SUNRISE', _TIMESTAMP, 'Sunrise time in UTC'),
+    Column('SUNSET', _TIMESTAMP, 'Sunset time in UTC'),
+    Column('TIMEZONE_SHIFT', _decimal(0), 'Hour shift from UTC to timezone of the specific city. E.g. 2 means UTC+2'),
+    Column('ZIP', _varchar(200), 'Dummy column for filtering API call by ZIP code.'),
+)
+
+FORECAST: tuple = (
+    Column('COUNTRY_CODE', _varchar(200), 'Countrycode of the country'),
+    Column('CITY_NAME', _varchar(200), 'The name of the city'),
+    Column('CITY_ID', _decimal(0), 'The ID of the city. Reference: https://openweathermap.org/find?q='),
+    Column('FORECAST_TIME', _TIMESTAMP, 'The timestamp of the forecast.'),
+    Column('LONGITUDE', _decimal(4), 'The longitude of the city'),
+    Column('LATITUDE', _decimal(4), 'The latitude of the city'),
+    Column('WEATHER_ID', _decimal(0), 'The ID of the forecasted weather condition. Reference: '
+                                      'https://openweathermap.org/weather-conditions#Weather-Condition-Codes-2'),
+    Column('WEATHER_GROUP', _varchar(200), 'The group name of the forecasted weather situation'),
+    Column('WEATHER_DESCRIPTION', _varchar(2000), 'The specific sub-group of weather conditions'),
+    Column('WEATHER_ICON_ID', _varchar(20), 'The weather icon ID. Reference: '
+                                            'https://openweathermap.org/weather-conditions'),
+    Column('TEMPERATURE', _decimal(2), 'Temperature in degrees centigrade'),
+    Column('FELT_TEMPERATURE', _decimal(2), 'Temperature as humans perceive it in degrees centigrade'),
+    Column('MIN_TEMPERATURE', _decimal(2), 'Lowest currently recorded temperature in degrees centigrade'),
+    Column('MAX_TEMPERATURE', _decimal(2), 'Highest currently recorded temperature in degrees centigrade'),
+    Column('ATMOSPHERIC_PRESSURE', _decimal(2), 'Atmospheric pressure (on the sea level, if there is no sea_level or '
+                                                'grnd_level data) in hPa'),
+    Column('RELATIVE_HUMIDITY', _decimal(0), 'Relative humidity in %'),
+    Column('ATMOSPHERIC_PRESSURE_SEA_LEVEL', _decimal(2), 'Atmospheric pressure on the sea level in hPa'),
+    Column('ATMOSPHERIC_PRESSURE_GROUND_LEVEL', _decimal(2), 'Atmospheric pressure on the ground level in hPa'),
+    Column('WIND_SPEED', _decimal(2), 'Wind speed in m/s'),
+    Column('WIND_DIRECTION', _decimal(0), 'Wind direction in meterological degrees'),
+    Column('PERCIPITATION_PROBABILITY', _decimal(2), 'Probability of percipitation'),
+    Column('CLOUDINESS', _decimal(0), 'Cloudiness in % sky coverage'),
+    Column('RAIN_3H', _decimal(2), 'Rain volume for the last 3 hours in mm'),
+    Column('SNOW_3H', _decimal(2), 'Snow volume for the last 3 hours in mm'),
+    Column('VISIBILITY', _decimal(0), 'Visibility in m'),
+    Column('SUNRISE', _TIMESTAMP, 'Sunrise time in UTC'),
+    Column('SUNSET', _TIMESTAMP, 'Sunset time in UTC'),
+    Column('TIMEZONE_SHIFT', _decimal(0), 'Hour shift from UTC to timezone of the specific city. E.g. 2 means UTC+2'),
+    Column('ZIP', _varchar(200), 'Dummy column for filtering API call by ZIP code.'),
+)
+
+TABLES: dict = {'CURRENT_WEATHER': CURRENT_WEATHER, 'FORECAST': FORECAST}
+
+
+def _emits_type(data_type: dict) -> str:
+    """:returns the type of the column in the EMITS clause of the UDF, DECIMALs are emitted as INT or DOUBLE."""
+    if data_type['type'] == 'DECIMAL':
+        return 'INT' if data_type['scale'] == 0 else 'DOUBLE'
+    elif data_type['type'] == 'VARCHAR':
+        return f"VARCHAR({data_type['size']})"
+    return data_type['type']
+
+
+COLUMN_NAMES: dict = {table: tuple(column.name for column in columns) for table, columns in TABLES.items()}
+EMITS_TYPES: dict = {table: {column.name: _emits_type(column.data_type) for column in columns}
+                     for table, columns in TABLES.items()}
+TABLE_METADATA: tuple = tuple(
+    {'name': table,
+     'columns': [{'name': column.name, 'dataType': column.data_type, 'comment': column.comment} for column in columns]}
+    for table, columns in TABLES.items())
+
+
+@functools.lru_cache(maxsize=256)
+def emits_clause(table: str, columns: tuple) -> str:
+    """:returns the column definitions of the EMITS clause for the given columns of the table."""
+    return ', '.join(f'{column.lower()} {EMITS_TYPES[table][column]}' for column in columns)
@@ -0,0 +1,63 @@
+"""Builds the pushdown requests Exasol sends to the adapter and reads the arguments of the UDF call from the SQL the
+adapter answers with."""
+import json
+import re
+
+from openweather_adapter import AdapterCallHandler
+
+UDF_ARGUMENTS: tuple = ('api_host', 'api_method', 'api_parameters', 'api_key', 'logger_ip', 'logger_port',
+                        'logger_level', 'api_options')
+
+PROPERTIES: dict = {'API_KEY': 'test', 'LOG_LISTENER': '127.0.0.1', 'LOG_LISTENER_PORT': '9', 'LOG_LEVEL': 'WARNING',
+                    'CACHE_BYPASS': 'TRUE'}
+
+
+def column(name: str) -> dict:
+    return {'type': 'column', 'name': name}
+
+
+def literal(value) -> dict:
+    if isinstance(value, str) and re.fullmatch(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}', value):
+        return {'type': 'literal_timestamp', 'value': value}
+    elif isinstance(value, str):
+        return {'type': 'literal_string', 'value': value}
+    return {'type': 'literal_exactnumeric' if isinstance(value, int) else 'literal_double', 'value': str(value)}
+
+
+def equal(name: str, value) -> dict:
+    return {'type': 'predicate_equal', 'left': column(name), 'right': literal(value)}
+
+
+def in_list(name: str, *values) -> dict:
+    return {'type': 'predicate_in_constlist', 'expression': column(name), 'arguments': [literal(v) for v in values]}
+
+
+def less(left: dict, right: dict, inclusive: bool = False) -> dict:
+    return {'type': 'predicate_lessequal' if inclusive else 'predicate_less', 'left': left, 'right': right}
+
+
+def and_(*expressions) -> dict:
+    return {'type': 'predicate_and', 'expressions': list(expressions)}
+
+
+def or_(*expressions) -> dict:
+    return {'type': 'predicate_or', 'expressions': list(expressions)}
+
+
+def pushdown_sql(table: str, filter_json: dict, columns: tuple = None, **properties) -> str:
+    """:returns the SQL the adapter answers a pushdown of SELECT columns FROM table WHERE filter_json with."""
+    pushdown_request: dict = {'type': 'select', 'from': {'type': 'table', 'name': table}}
+    if filter_json:
+        pushdown_request['filter'] = filter_json
+    if columns:
+        pushdown_request['selectList'] = [column(name) for name in columns]
+    schema_metadata_info: dict = {'name': 'OPENWEATHER', 'properties': {**PROPERTIES, **properties}}
+    request: str = json.dumps({'type': 'pushdown', 'schemaMetadataInfo': schema_metadata_info,
+                               'pushdownRequest': pushdown_request})
+    return json.loads(AdapterCallHandler(request).controll_request_processing())['sql']
+
+
+def udf_arguments(sql: str) -> dict:
+    """:returns the arguments of the api_handler call in the SQL by name."""
+    literals: list = [value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", sql)]
+    return dict(zip(UDF_ARGUMENTS, literals))
@@ -0,0 +1,116 @@
+import collections
+import json
+import urllib.parse
+
+import pytest
+
+from pushdown import and_, column, equal, in_list, less, literal, or_, pushdown_sql, udf_arguments
+
+requests = pytest.importorskip('requests')
+from api_handler import ApiHandler  # noqa: E402 --Needs requests
+
+START_TIME: int = 1760000400  # --2025-10-09 09:00:00 UTC, the first forecast slot
+CITIES: dict = {1: 'Berlin', 2: 'Paris', 3: 'Rome', 5: 'Madrid', 7: 'Vienna'}
+
+
+def current_weather(city_id: int) -> dict:
+    return {'id': city_id, 'name': CITIES[city_id], 'dt': START_TIME, 'timezone': 0,
+            'main': {'temp': city_id * 10.0}, 'sys': {'country': 'DE', 'sunrise': START_TIME, 'sunset': START_TIME}}
+
+
+def forecast(city_id: int) -> dict:
+    return {'cod': '200', 'cnt': 40,
+            'list': [{'dt': START_TIME + slot * 10800, 'main': {'temp': city_id * 10.0}} for slot in range(40)],
+            'city': {'id': city_id, 'name': CITIES[city_id], 'country': 'DE', 'timezone': 0,
+                     'sunrise': START_TIME, 'sunset': START_TIME}}
+
+
+class FakeApi:
+    """Answers the requests of the UDF in place of requests.Session.get and records their parameters."""
+
+    def __init__(self):
+        self.requests: list = []
+
+    def get(self, url: str) -> requests.Response:
+        parsed = urllib.parse.urlparse(url)
+        endpoint: str = parsed.path.rsplit('/', 1)[-1]
+        query: dict = dict(urllib.parse.parse_qsl(parsed.query))
+        location: str = query.get('id') or query.get('q')
+        self.requests.append(f'{endpoint}?{location}')
+
+        city_ids: list = [int(city_id) for city_id in query['id'].split(',')] if 'id' in query else [
+            city_id for city_id, name in CITIES.items() if name.lower() == query['q']]
+        if endpoint == 'group':
+            body: dict = {'cnt': len(city_ids), 'list': [current_weather(city_id) for city_id in city_ids]}
+        else:
+            body: dict = (current_weather if endpoint == 'weather' else forecast)(city_ids[0])
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        return response
+
+
+class Context:
+    """Stands in for the UDF context of Exasol with one input row and collects the emitted rows."""
+
+    def __init__(self, arguments: dict):
+        self._arguments: dict = arguments
+        self._finished: bool = False
+        self.rows: list = []
+
+    def __getattr__(self, name: str):
+        if name not in self.__dict__.get('_arguments', {}):
+            raise AttributeError(name)
+        if self._finished:
+            raise RuntimeError('Iteration finished')
+        return self._arguments[name]
+
+    def next(self) -> bool:
+        self._finished = True
+        return False
+
+    def emit(self, *row) -> None:
+        self.rows.append(row)
+
+
+@pytest.fixture
+def api(monkeypatch) -> FakeApi:
+    fake_api = FakeApi()
+    monkeypatch.setattr(requests.Session, 'get', lambda session, url, **kwargs: fake_api.get(url))
+    return fake_api
+
+
+def emitted_rows(table: str, filter_json: dict, columns: tuple) -> list:
+    """:returns the rows the UDF emits for the pushdown of SELECT columns FROM table WHERE filter_json."""
+    ctx = Context(udf_arguments(pushdown_sql(table, filter_json, columns)))
+    ApiHandler(ctx).api_calls()
+    return ctx.rows
+
+
+def test_range_filter_of_one_location(api):
+    rows: list = emitted_rows('FORECAST', or_(and_(equal('CITY_NAME', 'Paris'),
+                                                   less(column('FORECAST_TIME'), literal('2025-10-10 00:00:00.000'))),
+                                              equal('CITY_NAME', 'Berlin')), ('CITY_NAME', 'FORECAST_TIME'))
+    assert collections.Counter(name for name, _ in rows) == {'Paris': 5, 'Berlin': 40}
+
+
+def test_range_filters_per_city_of_a_group(api):
+    rows: list = emitted_rows('CURRENT_WEATHER', or_(and_(in_list('CITY_ID', 1, 2),
+                                                          less(literal(15), column('TEMPERATURE'))),
+                                                     equal('CITY_ID', 3)), ('CITY_ID',))
+    assert api.requests == ['group?1,2,3']
+    assert sorted(rows) == [(2,), (3,)]
+
+
+def test_in_list_and_equal_on_the_same_column(api):
+    rows: list = emitted_rows('CURRENT_WEATHER', and_(in_list('CITY_ID', 1, 5, 7), equal('CITY_ID', 5)),
+                              ('CITY_ID', 'CITY_NAME'))
+    assert api.requests == ['weather?5']
+    assert rows == [(5, 'Madrid')]
+
+
+def test_range_filter_of_all_locations(api):
+    lower_bound: dict = less(literal('2025-10-10 00:00:00.000'), column('FORECAST_TIME'), inclusive=True)
+    rows: list = emitted_rows('FORECAST', and_(in_list('CITY_ID', 1, 2), lower_bound), ('CITY_ID',))
+    assert collections.Counter(rows) == {(1,): 35, (2,): 35}
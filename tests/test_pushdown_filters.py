@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from pushdown import and_, column, equal, in_list, less, literal, or_, pushdown_sql, udf_arguments
+
+SOON: str = '2025-10-10 00:00:00.000'
+LATER: str = '2025-10-11 00:00:00.000'
+
+
+def normalized(table: str, filter_json: dict) -> tuple:
+    """:returns the locations, the range filters of all locations and the range filters per location of the pushdown."""
+    arguments: dict = udf_arguments(pushdown_sql(table, filter_json))
+    options: dict = json.loads(arguments['api_options'])
+    return json.loads(arguments['api_parameters']), options['range_filters'], options['location_filters']
+
+
+@pytest.mark.parametrize('filter_json, expected', [
+    pytest.param(and_(in_list('CITY_ID', 1, 5, 7), equal('CITY_ID', 5)),
+                 (['id=5'], [], {}), id='IN list and equal on the same column'),
+    pytest.param(and_(in_list('CITY_NAME', 'Berlin', 'Paris'), equal('CITY_NAME', 'paris')),
+                 (['q=paris'], [], {}), id='IN list of names and equal name'),
+    pytest.param(or_(equal('CITY_ID', 3), in_list('CITY_ID', 3, 1), equal('CITY_ID', 2)),
+                 (['id=1', 'id=2', 'id=3'], [], {}), id='duplicate city IDs'),
+    pytest.param(and_(in_list('CITY_NAME', 'Berlin', 'Paris'), equal('COUNTRY_CODE', 'DE')),
+                 (['q=berlin,de', 'q=paris,de'], [], {}), id='country code of an IN list'),
+    pytest.param(and_(or_(equal('CITY_NAME', 'Berlin'), equal('ZIP', 96050)), equal('COUNTRY_CODE', 'de')),
+                 (['q=berlin,de', 'zip=96050,de'], [], {}), id='country code of an OR'),
+    pytest.param(and_(equal('LONGITUDE', 12.48), equal('LATITUDE', 41.89)),
+                 (['lat=41.89&lon=12.48'], [], {}), id='coordinates'),
+    pytest.param(and_(in_list('CITY_NAME', 'Paris', 'Berlin'), less(column('FORECAST_TIME'), literal(SOON))),
+                 (['q=paris', 'q=berlin'], [['FORECAST_TIME', '<', SOON]], {}), id='range filter of all locations'),
+    pytest.param(or_(and_(equal('CITY_NAME', 'Paris'), less(column('FORECAST_TIME'), literal(SOON))),
+                     equal('CITY_NAME', 'Berlin')),
+                 (['q=paris', 'q=berlin'], [], {'q=paris': [[['FORECAST_TIME', '<', SOON]]]}),
+                 id='range filter of one location'),
+    pytest.param(and_(equal('CITY_NAME', 'Paris'),
+                      or_(less(column('FORECAST_TIME'), literal(SOON)), less(literal(LATER), column('FORECAST_TIME'),
+                                                                             inclusive=True))),
+                 (['q=paris'], [], {'q=paris': [[['FORECAST_TIME', '<', SOON]], [['FORECAST_TIME', '>=', LATER]]]}),
+                 id='alternative range filters'),
+    pytest.param(and_(less(column('FORECAST_TIME'), literal(LATER)),
+                      or_(and_(equal('CITY_ID', 2), less(literal(5), column('TEMPERATURE'))), equal('CITY_ID', 1))),
+                 (['id=1', 'id=2'], [['FORECAST_TIME', '<', LATER]], {'id=2': [[['TEMPERATURE', '>', 5.0]]]}),
+                 id='range filters of all locations and of one location'),
+])
+def test_normalized_filters(filter_json, expected):
+    assert normalized('FORECAST', filter_json) == expected
+
+
+@pytest.mark.parametrize('filter_json, error', [
+    pytest.param(and_(equal('CITY_ID', 5), equal('CITY_NAME', 'Berlin')), 'E-VS-OWFS-23', id='city ID and name'),
+    pytest.param(and_(equal('CITY_ID', 5), equal('COUNTRY_CODE', 'DE')), 'E-VS-OWFS-23', id='city ID and country'),
+    pytest.param(and_(equal('CITY_ID', 5), less(column('MIN_TEMPERATURE'), column('MAX_TEMPERATURE'))),
+                 'E-VS-OWFS-15', id='comparison of two columns'),
+    pytest.param(or_(equal('CITY_ID', 1), less(column('FORECAST_TIME'), literal(SOON))), 'E-VS-OWFS-14',
+                 id='range filter without location'),
+    pytest.param(equal('LATITUDE', 41.89), 'E-VS-OWFS-14', id='latitude without longitude'),
+    pytest.param(and_(equal('CITY_ID', 5), *[or_(less(column('TEMPERATURE'), literal(bound)),
+                                                 less(literal(bound + 100), column('TEMPERATURE')))
+                                             for bound in range(18)]), 'E-VS-OWFS-25', id='exponential expansion'),
+])
+def test_unsupported_filters_fail(filter_json, error):
+    with pytest.raises(ValueError, match=error):
+        pushdown_sql('FORECAST', filter_json)
+
+
+def test_conflicting_values_match_no_location():
+    assert normalized('CURRENT_WEATHER', and_(equal('CITY_NAME', 'Berlin'), equal('CITY_NAME', 'Paris'))) == \
+           ([], [], {})
+
+
+def test_in_lists_of_the_same_column_are_intersected():
+    city_ids: list = list(range(1, 2001))
+    locations, _, _ = normalized('CURRENT_WEATHER', and_(in_list('CITY_ID', *city_ids), in_list('CITY_ID', *city_ids)))
+    assert locations == [f'id={city_id}' for city_id in city_ids]
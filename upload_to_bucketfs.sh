@@ -0,0 +1,35 @@
+#!/usr/bin/env bash
+# Uploads the Python modules of the virtual schema to BucketFS. The adapter script and the UDF import them from there,
+# so neither of them needs to download code at query time.
+#
+# Usage: BUCKETFS_URL=http://<exasol host>:2580/default BUCKETFS_WRITE_PASSWORD=<password> ./upload_to_bucketfs.sh
+#
+# Set CITY_INDEX_FILE to also upload a city index built with city_index.py.
+set -euo pipefail
+
+: "${BUCKETFS_URL:?Please set BUCKETFS_URL, e.g. http://192.168.56.101:2580/default}"
+: "${BUCKETFS_WRITE_PASSWORD:?Please set BUCKETFS_WRITE_PASSWORD to the write password of the bucket}"
+BUCKETFS_DIRECTORY="${BUCKETFS_DIRECTORY:-openweather_vs}"
+
+MODULES="openweather_adapter.py
+api_handler.py
+plain_text_tcp_handler.py
+rate_limiter.py
+response_cache.py
+table_columns.py
+circuit_breaker.py
+city_index.py
+query_metrics.py"
+
+cd "$(dirname "$0")"
+for module in $MODULES; do
+    echo "Uploading ${module}"
+    curl --fail --silent --show-error --user "w:${BUCKETFS_WRITE_PASSWORD}" -X PUT -T "${module}" \
+        "${BUCKETFS_URL}/${BUCKETFS_DIRECTORY}/${module}"
+done
+
+if [ -n "${CITY_INDEX_FILE:-}" ]; then
+    echo "Uploading ${CITY_INDEX_FILE}"
+    curl --fail --silent --show-error --user "w:${BUCKETFS_WRITE_PASSWORD}" -X PUT -T "${CITY_INDEX_FILE}" \
+        "${BUCKETFS_URL}/${BUCKETFS_DIRECTORY}/$(basename "${CITY_INDEX_FILE}")"
+fi